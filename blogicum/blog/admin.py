@@ -1,33 +1,156 @@
 from django.contrib import admin
-from .models import Category, Location, Post, Comment
+from django.forms.models import BaseInlineFormSet, BaseModelFormSet
+from django.utils.text import Truncator
+
+from .constants import ADMIN_INLINE_POSTS, ADMIN_TEXT_LENGTH
+from .forms import (
+    CachedChoicesModelForm,
+    CachedModelChoiceField,
+    LoadedObjectField,
+)
+from .models import Category, Location, Post, Comment, Task
+from .paginators import ApproximateCountPaginator
+from .search import matching_post_ids, query_terms
+from .utils import export_response
 
 admin.site.empty_value_display = 'Не задано'
 
 
+@admin.action(description='Выгрузить выбранное в JSONL')
+def export_jsonl(modeladmin, request, queryset):
+    return export_response([queryset], 'jsonl')
+
+
+@admin.action(description='Выгрузить выбранное в CSV')
+def export_csv(modeladmin, request, queryset):
+    return export_response([queryset], 'csv')
+
+
+@admin.display(description='Текст')
+def short_text(obj):
+    return Truncator(obj.text).chars(ADMIN_TEXT_LENGTH)
+
+
+class LatestPostsFormSet(BaseInlineFormSet):
+
+    def get_queryset(self):
+        # Формы берут объекты по индексу: срез читается один раз.
+        if not hasattr(self, '_latest'):
+            self._latest = list(
+                super().get_queryset().order_by('-pk')[:ADMIN_INLINE_POSTS]
+            )
+        return self._latest
+
+
 class PostInline(admin.TabularInline):
+    """Последние посты только для просмотра.
+
+    Редактируются на своей странице, а не сотнями строк с выпадающими
+    списками.
+    """
+
     model = Post
-    extra = 0
+    formset = LatestPostsFormSet
+    fields = ('title', 'pub_date', 'is_published')
+    show_change_link = True
+    verbose_name_plural = f'Последние {ADMIN_INLINE_POSTS} публикаций'
+
+    # Без прав на изменение админка не проверяет строки при сохранении
+    # и не читает каждый пост отдельным запросом.
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class LoadedRowsFormSet(BaseModelFormSet):
+    """Строки list_editable, которые не перечитываются по одной.
+
+    Обычное поле ключа проверяет каждую строку отдельным запросом,
+    хотя все объекты формсет уже прочитал одним.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if form.instance.pk is not None:
+            form.fields[self._pk_field.name] = LoadedObjectField(
+                form.instance
+            )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список большой таблицы.
+
+    Общее число строк приблизительное, сортировка по ключу,
+    без второго COUNT для ссылки «показать все».
+    """
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', self.form)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', LoadedRowsFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+
+class VisibilityCascadeAdmin(admin.ModelAdmin):
+    """Сообщает, сколько строк и за какое время обновил каскад видимости.
+
+    Каскад выполняют сигналы при смене is_published категории
+    или названия и публикации местоположения, а также при их удалении.
+    """
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self.report_cascade(request, obj)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.report_cascade(request, obj)
+
+    def report_cascade(self, request, obj):
+        cascade = getattr(obj, '_cascade', None)
+        if cascade is None:
+            return
+        posts, entries, seconds = cascade
+        self.message_user(
+            request,
+            f'«{obj}»: обновлено постов — {posts}, записей лент — '
+            f'{entries} за {seconds * 1000:.1f} мс.',
+        )
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(VisibilityCascadeAdmin):
+    search_fields = ('title',)
     inlines = (
         PostInline,
     )
 
 
 @admin.register(Location)
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(VisibilityCascadeAdmin):
+    search_fields = ('name',)
     inlines = (
         PostInline,
     )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
+    form = CachedChoicesModelForm
     list_display = (
         'title',
-        'text',
+        short_text,
         'pub_date',
         'author',
         'location',
@@ -39,17 +162,70 @@ class PostAdmin(admin.ModelAdmin):
         'is_published',
         'category'
     )
+    list_select_related = ('author', 'location', 'category')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('location',)
     search_fields = ('title',)
-    list_filter = ('is_published',)
+    list_filter = ('is_published', 'category')
     list_display_links = ('title',)
+    actions = (export_jsonl, export_csv)
+
+    def get_queryset(self, request):
+        # Сохранение list_editable берёт посты отсюда, а сигналам
+        # нужны автор и категория каждого поста.
+        return super().get_queryset(request).select_related(
+            *self.list_select_related
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'category':
+            # Категорий немного: список читается один раз на все строки,
+            # а не отдельным запросом в каждой строке list_editable.
+            kwargs['form_class'] = CachedModelChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по id или по словам через поисковый индекс постов."""
+        search_term = search_term.strip()
+        if search_term.isdigit():
+            return queryset.filter(pk=int(search_term)), False
+        terms = query_terms(search_term)
+        if not terms:
+            return queryset, False
+        return queryset.filter(pk__in=matching_post_ids(terms)), False
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'id',
-        'text',
+        short_text,
         'created_at',
-        'author_id',
-        'post_id',
+        'author',
+        'post',
+    )
+    list_select_related = ('author', 'post')
+    raw_id_fields = ('author', 'post')
+    search_fields = ('=author__username',)
+    actions = (export_jsonl, export_csv)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Число — id поста, иначе точное имя автора."""
+        search_term = search_term.strip()
+        if search_term.isdigit():
+            return queryset.filter(post_id=int(search_term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'finished_at',
     )
+    list_filter = ('status',)
+    readonly_fields = ('started_at', 'finished_at', 'last_error')
@@ -0,0 +1,158 @@
+import hashlib
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+FEED_CACHE_TIMEOUT = 300
+
+GENERATION_KEY = 'blog:feed:gen:{}'
+PAGE_KEY = 'blog:feed:page:{}'
+COUNT_KEY = 'blog:feed:count:{}'
+STATS_KEY = 'blog:feed:stats:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_FEED_CACHE', 'default')]
+
+
+def _generations(scopes):
+    cache = get_cache()
+    keys = {GENERATION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    missing = {key: _initial_generation() for key in keys if key not in found}
+    if missing:
+        # Несколько процессов могут начать счётчик одновременно:
+        # add() не перезапишет уже записанное значение.
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, 0) for key in keys]
+
+
+def _initial_generation():
+    # Счётчик, вытесненный из кеша, начинается заново с большего
+    # значения, чтобы не совпасть со старыми ключами страниц.
+    return time.time_ns() // 1000
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+
+
+def invalidate(*scopes):
+    """Сбрасывает закешированные страницы лент для указанных областей.
+
+    Области: 'all', 'index', 'category', 'profile',
+    'category:<slug>' и 'profile:<username>'. Счётчики увеличиваются
+    сразу и ещё раз после коммита, чтобы страница, собранная
+    параллельным запросом до коммита, не осталась в кеше.
+    """
+    scopes = [scope for scope in scopes if scope]
+    _bump(scopes)
+    transaction.on_commit(partial(_bump, scopes))
+
+
+def _record(outcome):
+    cache = get_cache()
+    key = STATS_KEY.format(outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def feed_cache_stats():
+    cache = get_cache()
+    return {
+        outcome: cache.get(STATS_KEY.format(outcome), 0)
+        for outcome in ('hits', 'misses')
+    }
+
+
+def feed_page_key(request, scopes):
+    generations = _generations(scopes)
+    raw = '|'.join((
+        request.get_full_path(),
+        *(f'{scope}={gen}' for scope, gen in zip(scopes, generations)),
+    ))
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def feed_count_key(scopes, variant=''):
+    """Ключ числа постов ленты: сбрасывается вместе с её страницами."""
+    raw = '|'.join((
+        variant, *scopes, *map(str, _generations(scopes)),
+    ))
+    return COUNT_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def feed_scopes(family, key=None):
+    scopes = ['all', family]
+    if key is not None:
+        scopes.append(f'{family}:{key}')
+    return scopes
+
+
+def _feed_scopes(family, scope_kwarg, kwargs):
+    return feed_scopes(family, kwargs[scope_kwarg] if scope_kwarg else None)
+
+
+def feed_etag(family, scope_kwarg=None):
+    """Считает ETag ленты по счётчикам поколений, не обращаясь к БД."""
+    def etag(request, *args, **kwargs):
+        scopes = _feed_scopes(family, scope_kwarg, kwargs)
+        raw = '|'.join((
+            request.get_full_path(),
+            str(request.user.pk),
+            *map(str, _generations(scopes)),
+        ))
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag
+
+
+def cache_feed_page(family, scope_kwarg=None):
+    """Кеширует готовый HTML страницы ленты для анонимных посетителей."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = feed_page_key(
+                request, _feed_scopes(family, scope_kwarg, kwargs)
+            )
+            cache = get_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                _record('hits')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            _record('misses')
+            response = view(request, *args, **kwargs)
+
+            def store(response):
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(
+                        key,
+                        (response.content, response['Content-Type']),
+                        getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT',
+                                FEED_CACHE_TIMEOUT),
+                    )
+
+            if getattr(response, 'is_rendered', True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+            return response
+        return wrapper
+    return decorator
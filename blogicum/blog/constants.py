@@ -1,9 +1,62 @@
-from django.utils import timezone
-
 NUMBER_OF_POSTS = 10
 
+POSTS_ORDERING = ('-pub_date', 'title', 'id')
+
+# Сколько комментариев показывать сразу и подгружать за один раз
+COMMENTS_PER_PAGE = 20
+
+COMMENTS_ORDERING = ('created_at', 'id')
+
+# Условия видимости поста кроме даты публикации: вместе с ней
+# они денормализованы в Post.is_visible.
 FILTERS_FOR_PUBLIC = {
     'is_published': True,
     'category__is_published': True,
-    'pub_date__lte': timezone.now()
 }
+
+# Сколько секунд кешируется дата ближайшей отложенной публикации
+SCHEDULE_CACHE_TIMEOUT = 300
+
+# Столько секунд страницы не ставят вторую задачу публикации,
+# пока первая не завершилась
+SCHEDULE_LOCK_TIMEOUT = 60
+
+# Дольше этого publish_scheduled не спит, даже если ждать нечего
+SCHEDULE_MAX_SLEEP = 60
+
+# Ширины (px) производных изображений постов для srcset
+IMAGE_WIDTHS = (320, 640, 1280)
+
+IMAGE_QUALITY = 82
+
+# Каталог производных внутри MEDIA_ROOT
+IMAGE_DERIVATIVES_DIR = 'derivatives'
+
+# Вес слова из заголовка против слова из текста или комментария
+SEARCH_TITLE_WEIGHT = 3
+
+# Сколько слов запроса учитывает поиск
+SEARCH_MAX_TERMS = 8
+
+SEARCH_ORDERING = ('-rank', 'id')
+
+# Длина текста в колонках списков админки
+ADMIN_TEXT_LENGTH = 50
+
+# Сколько последних постов показывать на странице категории и места
+ADMIN_INLINE_POSTS = 10
+
+# До такого числа строк списки админки и ленты считаются точно
+EXACT_COUNT_LIMIT = 10000
+
+# Сколько секунд хранится число постов ленты для пагинации
+FEED_COUNT_TIMEOUT = 300
+
+# Сколько секунд после записи сессия читает основную базу, а не реплики
+REPLICA_PIN_SECONDS = 10
+
+# Сколько слов текста выводит карточка поста (truncatewords в post_card.html)
+CARD_EXCERPT_WORDS = 10
+
+# Порядок материализованных лент: тот же, что POSTS_ORDERING
+TIMELINE_ORDERING = ('-pub_date', 'title', 'post_id')
@@ -0,0 +1,187 @@
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .constants import REPLICA_PIN_SECONDS
+
+# Время последней записи сессии: до конца окна она читает основную базу
+LAST_WRITE_SESSION_KEY = 'blog_last_write'
+
+# Сессии и кеш в БД читаются только из основной базы, а их запись
+# не закрепляет сессию: иначе её закреплял бы почти каждый запрос.
+PRIMARY_ONLY_APPS = ('sessions', 'django_cache')
+
+_local = threading.local()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет BLOG_SQLITE_PRAGMAS к каждому новому соединению SQLite.
+
+    WAL позволяет читать ленты, пока add_comment пишет, а busy_timeout
+    ждёт освобождения блокировки вместо ошибки «database is locked».
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(getattr(settings, 'BLOG_SQLITE_PRAGMAS', {}))
+    if connection.alias in get_replicas():
+        # Случайная запись в копию-реплику пропала бы при следующей копии.
+        pragmas['query_only'] = 1
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    """Закрывает переживший запрос разорванный постоянный коннект.
+
+    Аналог CONN_HEALTH_CHECKS из новых версий Django: без проверки
+    первый запрос после обрыва связи с БД завершился бы ошибкой.
+    """
+    if not getattr(settings, 'BLOG_CONN_HEALTH_CHECKS', False):
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+def get_replicas():
+    return list(getattr(settings, 'BLOG_DB_REPLICAS', ()))
+
+
+def copy_sqlite_replica(alias, using=DEFAULT_DB_ALIAS):
+    """Копирует основную базу SQLite в файл реплики `alias`.
+
+    Заменяет репликацию локально и в тестах: между копиями реплика
+    отстаёт от основной базы, как настоящая. Backup API даёт
+    согласованный снимок и при одновременной записи.
+    """
+    source = connections[using]
+    source.ensure_connection()
+    target_name = connections[alias].settings_dict['NAME']
+    with closing(sqlite3.connect(target_name)) as target:
+        source.connection.backup(target)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Отслеживает запись в текущем потоке; `enabled` — читать с реплик.
+
+    Чтение с реплик продолжается до первой записи.
+    """
+    previous = getattr(_local, 'state', None)
+    _local.state = {'replica': enabled, 'wrote': False}
+    try:
+        yield _local.state
+    finally:
+        _local.state = previous
+
+
+class PrimaryReplicaRouter:
+    """Запись — в основную базу, чтение внутри replica_reads — с реплик.
+
+    После первой записи в потоке и внутри транзакции чтение тоже идёт
+    в основную базу, чтобы запрос видел собственные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = getattr(_local, 'state', None)
+        replicas = get_replicas()
+        if (
+            not replicas or state is None or not state['replica']
+            or state['wrote'] or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = getattr(_local, 'state', None)
+        if (
+            state is not None
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+        ):
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему от основной базы.
+        return db not in get_replicas()
+
+
+def get_pin_seconds():
+    return getattr(settings, 'BLOG_REPLICA_PIN_SECONDS', REPLICA_PIN_SECONDS)
+
+
+class ReplicaReadsMiddleware:
+    """Чтение с реплик для GET и HEAD: ленты, посты, профили.
+
+    Запрос, который что-то записал, отмечает время в сессии. Следующие
+    BLOG_REPLICA_PIN_SECONDS секунд эта сессия читает основную базу:
+    после add_comment или создания поста автор увидит свою запись
+    на странице, куда его перенаправили, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with replica_reads(
+            request.method in ('GET', 'HEAD') and not self.is_pinned(request)
+        ) as state:
+            response = self.get_response(request)
+        if state['wrote'] and hasattr(request, 'session'):
+            request.session[LAST_WRITE_SESSION_KEY] = time.time()
+        return response
+
+    @staticmethod
+    def is_pinned(request):
+        session = getattr(request, 'session', None)
+        if session is None:
+            return False
+        last_write = session.get(LAST_WRITE_SESSION_KEY)
+        return (
+            last_write is not None
+            and time.time() - last_write < get_pin_seconds()
+        )
+
+
+def health():
+    """Состояние баз данных и кеша для проверки балансировщиком."""
+    report = {'databases': {}, 'cache': 'ok'}
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            report['databases'][alias] = 'ok'
+        except Exception as error:
+            report['databases'][alias] = f'{type(error).__name__}: {error}'
+    try:
+        cache = caches['default']
+        cache.set('blog:health', 1, 10)
+        if cache.get('blog:health') != 1:
+            report['cache'] = 'не читается'
+    except Exception as error:
+        report['cache'] = f'{type(error).__name__}: {error}'
+    report['ok'] = report['cache'] == 'ok' and all(
+        state == 'ok' for state in report['databases'].values()
+    )
+    return report
@@ -26,3 +26,65 @@ class UserForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Выбор из небольшой таблицы, прочитанной один раз.
+
+    Копии поля в строках формсета разделяют прочитанные объекты:
+    ни вывод списка, ни проверка значения не обращаются к БД.
+    """
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.choices = list(self.choices)
+        self._objects = {
+            str(value.value): value.instance
+            for value, _ in self.choices if value != ''
+        }
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self._objects[str(getattr(value, 'pk', value))]
+        except KeyError:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+class CachedChoicesModelForm(forms.ModelForm):
+    """Модель не перепроверяет ключи, уже найденные CachedModelChoiceField.
+
+    Иначе ForeignKey.validate делает запрос на каждую строку формсета.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.extend(
+            name for name, field in self.fields.items()
+            if isinstance(field, CachedModelChoiceField)
+        )
+        return exclude
+
+
+class LoadedObjectField(forms.Field):
+    """Ключ строки формсета, объект которой уже прочитан."""
+
+    widget = forms.HiddenInput
+
+    def __init__(self, obj, **kwargs):
+        super().__init__(required=False, initial=obj.pk, **kwargs)
+        self.obj = obj
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if str(value) != str(self.obj.pk):
+            raise forms.ValidationError(
+                'Строка не совпадает с объектом.', code='invalid_choice'
+            )
+        return self.obj
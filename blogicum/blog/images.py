@@ -0,0 +1,117 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_DERIVATIVES_DIR, IMAGE_QUALITY, IMAGE_WIDTHS
+
+# Расширение файла и формат Pillow для каждой производной
+IMAGE_FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpg', 'JPEG'),
+)
+
+# Форматы, которые пересохраняются без потерь кадров и анимации
+EXIF_FORMATS = ('JPEG', 'WEBP')
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, 'BLOG_IMAGE_WIDTHS', IMAGE_WIDTHS)))
+
+
+def widths_for(original_width):
+    """Ширины производных, которые меньше оригинала."""
+    return [width for width in get_widths() if width < original_width]
+
+
+def derivative_name(name, width, extension):
+    # Имя оригинала сохраняется с расширением: иначе a.jpg и a.png
+    # делили бы одни и те же производные.
+    path = PurePosixPath(name)
+    return str(
+        PurePosixPath(IMAGE_DERIVATIVES_DIR) / path.parent
+        / f'{path.name}_{width}w.{extension}'
+    )
+
+
+def delete_derivatives(name, storage=None):
+    """Удаляет уменьшенные копии изображения всех ширин и форматов."""
+    storage = storage or default_storage
+    for width in get_widths():
+        for extension, _ in IMAGE_FORMATS:
+            path = derivative_name(name, width, extension)
+            if storage.exists(path):
+                storage.delete(path)
+
+
+def build_derivatives(name, storage=None):
+    """Сохраняет уменьшенные копии изображения в WebP и JPEG.
+
+    Возвращает ширину оригинала: по ней шаблоны узнают,
+    какие производные существуют.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    image = image.convert('RGB')
+    for width in widths_for(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for extension, image_format in IMAGE_FORMATS:
+            buffer = BytesIO()
+            resized.save(
+                buffer, image_format, quality=IMAGE_QUALITY, optimize=True
+            )
+            path = derivative_name(name, width, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+    return image.width
+
+
+def strip_exif(name, storage=None):
+    """Перезаписывает оригинал без метаданных EXIF.
+
+    Ориентация из EXIF применяется к пикселям, остальное (координаты,
+    модель камеры) отбрасывается. Возвращает имя файла в хранилище.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image_format = image.format
+        if (
+            image_format not in EXIF_FORMATS
+            or getattr(image, 'is_animated', False)
+            or not image.getexif()
+        ):
+            return name
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=IMAGE_QUALITY)
+    storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def get_image_sources(name, original_width, storage=None):
+    """Атрибуты srcset для готовых производных или None."""
+    if not name or not original_width:
+        return None
+    widths = widths_for(original_width)
+    if not widths:
+        return None
+    storage = storage or default_storage
+    sources = {
+        extension: ', '.join(
+            f'{storage.url(derivative_name(name, width, extension))} {width}w'
+            for width in widths
+        )
+        for extension, _ in IMAGE_FORMATS
+    }
+    sources['src'] = storage.url(derivative_name(name, widths[-1], 'jpg'))
+    return sources
@@ -0,0 +1,106 @@
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.db import connections
+from django.template.base import Template
+
+_local = threading.local()
+_installed = False
+
+
+class Measurement:
+    """Время запроса по частям: SQL, шаблоны и остальной Python."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.total = 0.0
+        self._template_depth = 0
+
+    @property
+    def python_time(self):
+        return max(0.0, self.total - self.query_time - self.template_time)
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'queries': self.queries,
+            'query_time': self.query_time,
+            'template_time': self.template_time,
+            'python_time': self.python_time,
+        }
+
+
+def _active():
+    if not hasattr(_local, 'measurements'):
+        _local.measurements = []
+    return _local.measurements
+
+
+def _install_template_timer():
+    # Template.render вызывается и для {% include %}: время считается
+    # только у внешнего шаблона, запросы внутри него относятся к SQL.
+    global _installed
+    if _installed:
+        return
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, context):
+        outer = [m for m in _active() if not m._template_depth]
+        if not outer:
+            return render(self, context)
+        started = []
+        for measurement in outer:
+            measurement._template_depth += 1
+            started.append(measurement.query_time)
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            for measurement, query_time in zip(outer, started):
+                measurement._template_depth -= 1
+                measurement.template_time += (
+                    elapsed - (measurement.query_time - query_time)
+                )
+
+    Template.render = timed_render
+    _installed = True
+
+
+def _timed_execute(measurement):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            measurement.queries += 1
+            measurement.query_time += time.perf_counter() - start
+    return wrapper
+
+
+@contextmanager
+def measure():
+    """Замеряет код внутри блока в текущем потоке по всем базам.
+
+    Блоки можно вкладывать: внешний замер учитывает и то,
+    что попало во внутренний.
+    """
+    _install_template_timer()
+    measurement = Measurement()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(
+                _timed_execute(measurement)
+            ))
+        _active().append(measurement)
+        start = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            measurement.total = time.perf_counter() - start
+            _active().remove(measurement)
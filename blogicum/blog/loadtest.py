@@ -0,0 +1,330 @@
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.sessions.backends.db import SessionStore
+from django.db.models import Count
+from django.urls import reverse
+
+from .instrumentation import measure
+from .models import Category, Comment, Post
+
+User = get_user_model()
+
+# Доля запросов к каждой странице: (вес, метод, кто запрашивает).
+# Кто: None — аноним или пользователь, 'user' — автор своих
+# постов и комментариев, 'staff' — сотрудник.
+LOAD_MIX = {
+    'index': (30, 'get', None),
+    'post_detail': (25, 'get', None),
+    'post_comments': (4, 'get', None),
+    'category_posts': (10, 'get', None),
+    'profile': (8, 'get', None),
+    'search': (5, 'get', None),
+    'create_post': (1, 'get', 'user'),
+    'edit_post': (1, 'get', 'user'),
+    'delete_post': (1, 'get', 'user'),
+    'edit_profile': (1, 'get', 'user'),
+    'add_comment': (3, 'post', 'user'),
+    'edit_comment': (1, 'get', 'user'),
+    'delete_comment': (1, 'get', 'user'),
+    'feed_cache_stats': (1, 'get', 'staff'),
+    'task_stats': (1, 'get', 'staff'),
+    'profiling': (1, 'get', 'staff'),
+    'metrics': (1, 'get', 'staff'),
+    'health': (1, 'get', None),
+    # Выгрузка читает таблицу целиком; включается явно через --weight.
+    'export': (0, 'get', 'staff'),
+}
+
+# Не localhost из INTERNAL_IPS: иначе ответы дополнит debug toolbar.
+REMOTE_ADDR = '192.0.2.1'
+
+
+def percentile(samples, fraction):
+    """Перцентиль по ближайшему рангу; samples должен быть отсортирован."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+def zipf_choice(rng, items):
+    return rng.choices(
+        items, weights=[1 / rank for rank in range(1, len(items) + 1)]
+    )[0]
+
+
+class Session:
+    """Cookie одного клиента: сессия и CSRF-токен."""
+
+    def __init__(self, user=None):
+        self.user = user
+        self.cookies = SimpleCookie()
+        self.posts = []
+        self.comments = []
+        if user is not None:
+            store = SessionStore()
+            store[SESSION_KEY] = str(user.pk)
+            store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            store.save()
+            self.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+
+    def environ(self, method, path, query='', data=None):
+        body = urlencode(data or {}).encode()
+        environ = {
+            'REQUEST_METHOD': method.upper(),
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'REMOTE_ADDR': REMOTE_ADDR,
+            'HTTP_HOST': settings.ALLOWED_HOSTS[0]
+            if settings.ALLOWED_HOSTS else 'localhost',
+            'HTTP_COOKIE': '; '.join(
+                f'{key}={morsel.value}' for key, morsel in self.cookies.items()
+            ),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+        }
+        csrf = self.cookies.get(settings.CSRF_COOKIE_NAME)
+        if csrf is not None:
+            environ['HTTP_X_CSRFTOKEN'] = csrf.value
+        setup_testing_defaults(environ)
+        return environ
+
+    def remember(self, headers):
+        for name, value in headers:
+            if name.lower() == 'set-cookie':
+                self.cookies.load(value)
+
+
+def call(application, session, method, path, query='', data=None):
+    """Выполняет запрос через WSGI-приложение и читает ответ целиком."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    result = application(session.environ(method, path, query, data),
+                         start_response)
+    try:
+        for _ in result:
+            pass
+    finally:
+        # close() отправляет request_finished, как настоящий сервер.
+        if hasattr(result, 'close'):
+            result.close()
+    session.remember(response['headers'])
+    return response['status']
+
+
+class Sampler:
+    """Адреса страниц из реальных данных с «популярными» объектами."""
+
+    def __init__(self, rng, sessions, staff, sample=1000):
+        self.rng = rng
+        self.sessions = sessions
+        self.staff = staff
+        self.posts = list(Post.objects.published().order_by(
+            '-comment_count', 'id'
+        ).values_list('id', 'title')[:sample])
+        self.categories = list(Category.objects.filter(
+            is_published=True
+        ).values_list('slug', flat=True)[:sample])
+        self.authors = list(User.objects.annotate(
+            post_total=Count('posts')
+        ).filter(post_total__gt=0).order_by('-post_total').values_list(
+            'username', flat=True
+        )[:sample])
+
+    def request(self, name):
+        """(сессия, метод, путь, query, данные) или None, если данных нет."""
+        _, method, who = LOAD_MIX[name]
+        session = self.pick_session(who)
+        if session is None:
+            return None
+        build = getattr(self, f'_{name}', None)
+        kwargs = build(session) if build else {}
+        if kwargs is None:
+            return None
+        query = ''
+        data = None
+        if name == 'search':
+            query = urlencode({'q': kwargs.pop('q')})
+        elif name in ('index', 'category_posts', 'profile'):
+            # Каждый пятый просмотр ленты — не первая страница.
+            if self.rng.random() < 0.2:
+                query = f'page={self.rng.randint(2, 5)}'
+        elif name == 'add_comment':
+            data = {'text': 'Комментарий нагрузочного теста'}
+        path = reverse(f'blog:{name}', kwargs=kwargs)
+        return session, method, path, query, data
+
+    def _post(self):
+        return zipf_choice(self.rng, self.posts)[0] if self.posts else None
+
+    def _post_detail(self, session):
+        post_id = self._post()
+        return {'pk': post_id} if post_id else None
+
+    _post_comments = _post_detail
+
+    def _add_comment(self, session):
+        post_id = self._post()
+        return {'post_id': post_id} if post_id else None
+
+    def _edit_post(self, session):
+        if not session.posts:
+            return None
+        return {'pk': self.rng.choice(session.posts)}
+
+    _delete_post = _edit_post
+
+    def _edit_comment(self, session):
+        if not session.comments:
+            return None
+        post_id, comment_id = self.rng.choice(session.comments)
+        return {'post_id': post_id, 'comment_id': comment_id}
+
+    _delete_comment = _edit_comment
+
+    def _category_posts(self, session):
+        if not self.categories:
+            return None
+        return {'category_slug': zipf_choice(self.rng, self.categories)}
+
+    def _profile(self, session):
+        if not self.authors:
+            return None
+        return {'username': zipf_choice(self.rng, self.authors)}
+
+    def _search(self, session):
+        if not self.posts:
+            return None
+        return {'q': self.rng.choice(self.rng.choice(self.posts)[1].split())}
+
+    def _export(self, session):
+        return {'model_name': 'post'}
+
+    def pick_session(self, who):
+        if who == 'staff':
+            return self.staff
+        if who == 'user':
+            return self.rng.choice(self.sessions) if self.sessions else None
+        if self.sessions and self.rng.random() < 0.2:
+            return self.rng.choice(self.sessions)
+        return Session()
+
+
+def make_sessions(total):
+    """Сессии авторов, у которых есть и посты, и комментарии."""
+    users = list(User.objects.filter(
+        posts__isnull=False, comment__isnull=False
+    ).distinct().order_by('id')[:total])
+    sessions = []
+    for user in users:
+        session = Session(user)
+        session.posts = list(Post.objects.filter(
+            author=user
+        ).values_list('id', flat=True)[:50])
+        session.comments = list(Comment.objects.filter(
+            author=user
+        ).values_list('post_id', 'id')[:50])
+        sessions.append(session)
+    staff = User.objects.filter(is_staff=True, is_active=True).first()
+    return sessions, Session(staff) if staff else Session()
+
+
+class LoadTest:
+    """Прогон смеси запросов в несколько потоков с замером задержек."""
+
+    def __init__(self, application, weights=None, sessions=5, seed=None):
+        self.application = application
+        self.weights = {
+            name: weight for name, (weight, _, _) in LOAD_MIX.items()
+        }
+        self.weights.update(weights or {})
+        self.rng = random.Random(seed)
+        logged_in, staff = make_sessions(sessions)
+        self.sampler = Sampler(self.rng, logged_in, staff)
+        for session in logged_in:
+            # Страница с формой выдаёт CSRF-cookie для POST-запросов.
+            call(application, session, 'get', reverse('blog:create_post'))
+        self.results = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def plan(self, total):
+        names = [name for name, weight in self.weights.items() if weight > 0]
+        requests = []
+        while len(requests) < total:
+            name = self.rng.choices(
+                names, weights=[self.weights[name] for name in names]
+            )[0]
+            request = self.sampler.request(name)
+            if request is not None:
+                requests.append((name, request))
+            elif all(self.sampler.request(other) is None for other in names):
+                break
+        return requests
+
+    def run_one(self, name, request):
+        session, method, path, query, data = request
+        with measure() as measurement:
+            try:
+                status = call(
+                    self.application, session, method, path, query, data
+                )
+            except Exception:
+                status = 500
+        return name, status, measurement.total, measurement.queries
+
+    def run(self, total, workers=4, warmup=0):
+        for name, request in self.plan(warmup):
+            self.run_one(name, request)
+        requests = self.plan(total)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for name, status, elapsed, queries in executor.map(
+                lambda item: self.run_one(*item), requests
+            ):
+                self.results[name].append((elapsed, queries))
+                if status >= 400:
+                    self.errors[name] += 1
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        rows = {}
+        for name, samples in sorted(self.results.items()):
+            timings = sorted(elapsed for elapsed, _ in samples)
+            rows[name] = {
+                'requests': len(samples),
+                'errors': self.errors[name],
+                'p50_ms': percentile(timings, 0.50) * 1000,
+                'p95_ms': percentile(timings, 0.95) * 1000,
+                'p99_ms': percentile(timings, 0.99) * 1000,
+                'queries': sum(queries for _, queries in samples)
+                / len(samples),
+            }
+        total = sum(row['requests'] for row in rows.values())
+        return {
+            'urls': rows,
+            'requests': total,
+            'seconds': elapsed,
+            'rps': total / elapsed if elapsed else 0.0,
+        }
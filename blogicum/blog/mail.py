@@ -0,0 +1,72 @@
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+
+def serialize_message(message):
+    """Письмо в виде JSON-совместимого словаря для очереди задач."""
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': [
+            (
+                filename,
+                base64.b64encode(
+                    content.encode() if isinstance(content, str) else content
+                ).decode(),
+                mimetype,
+            )
+            for filename, content, mimetype in message.attachments
+        ],
+    }
+
+
+def deserialize_message(data, connection=None):
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+        connection=connection,
+    )
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+@task(max_retries=5)
+def send_email(data):
+    connection = get_connection(
+        getattr(settings, 'BLOG_EMAIL_DELIVERY_BACKEND', DELIVERY_BACKEND)
+    )
+    connection.send_messages([deserialize_message(data, connection)])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в фоновую очередь вместо отправки в запросе.
+
+    Письма доставляет бэкенд из настройки BLOG_EMAIL_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_email.delay(serialize_message(message))
+        return len(email_messages)
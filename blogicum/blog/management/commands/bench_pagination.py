@@ -0,0 +1,97 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from blog.constants import NUMBER_OF_POSTS, POSTS_ORDERING
+from blog.models import Category, Location, Post
+from blog.paginators import CursorPaginator
+from blog.utils import search_params
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время первой и глубокой страницы ленты '
+        'в режимах ?page=N и курсорной пагинации. '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        deep_page = options['page']
+        with transaction.atomic():
+            self.seed(deep_page * NUMBER_OF_POSTS, options['batch_size'])
+            posts = search_params(Post.objects)
+            rows = [
+                ('page', 1, self.time_offset(posts, 1, options['repeat'])),
+                ('page', deep_page,
+                 self.time_offset(posts, deep_page, options['repeat'])),
+                ('cursor', 1, self.time_cursor(posts, 1, options['repeat'])),
+                ('cursor', deep_page,
+                 self.time_cursor(posts, deep_page, options['repeat'])),
+            ]
+            transaction.set_rollback(True)
+        for mode, number, seconds in rows:
+            self.stdout.write(
+                f'{mode:<7} page {number:>6}: {seconds * 1000:8.2f} ms'
+            )
+
+    def seed(self, total, batch_size):
+        author = User.objects.create(username='bench_pagination')
+        category = Category.objects.create(
+            title='Bench', description='Bench', slug='bench-pagination'
+        )
+        location = Location.objects.create(name='Bench')
+        start = timezone.now() - timedelta(days=1)
+        Post.objects.bulk_create(
+            (
+                Post(
+                    title=f'Post {index}',
+                    text='Bench',
+                    pub_date=start - timedelta(minutes=index // 3),
+                    author=author,
+                    category=category,
+                    location=location,
+                )
+                for index in range(total)
+            ),
+            batch_size=batch_size,
+        )
+
+    def time_offset(self, posts, number, repeat):
+        def run():
+            page = Paginator(posts, NUMBER_OF_POSTS).page(number)
+            list(page)
+        return self.measure(run, repeat)
+
+    def time_cursor(self, posts, number, repeat):
+        paginator = CursorPaginator(posts, NUMBER_OF_POSTS, POSTS_ORDERING)
+        cursor = None
+        if number > 1:
+            # Курсор указывает на последний пост предыдущей страницы.
+            anchor = posts[(number - 1) * NUMBER_OF_POSTS - 1]
+            cursor = paginator.encode_cursor(anchor, 'next')
+
+        def run():
+            list(paginator.page(cursor))
+        return self.measure(run, repeat)
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
@@ -0,0 +1,114 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from faker import Faker
+
+from blog.constants import NUMBER_OF_POSTS
+from blog.management.commands.rebuild_search_index import build_entries
+from blog.models import Category, Location, Post
+from blog.search import insert_entries, search_page
+from blog.utils import search_params
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по индексу с LIKE-поиском на синтетических '
+        'постах. Данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=40)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        vocabulary = list(dict.fromkeys(fake.words(nb=3000)))
+        # Частоты слов по закону Ципфа, как в живом тексте.
+        frequencies = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        # Частое, среднее, редкое слово и пара слов.
+        queries = (
+            vocabulary[0],
+            vocabulary[len(vocabulary) // 2],
+            vocabulary[-1],
+            f'{vocabulary[1]} {vocabulary[20]}',
+        )
+        with transaction.atomic():
+            start = time.perf_counter()
+            self.seed(options, vocabulary, frequencies)
+            self.stdout.write(
+                f'Корпус и индекс: {time.perf_counter() - start:.1f} с.'
+            )
+            posts = search_params(Post.objects)
+            for query in queries:
+                indexed = self.measure(
+                    lambda: list(search_page(query)), options['repeat']
+                )
+                scan = self.measure(
+                    lambda: list(posts.filter(
+                        Q(title__icontains=query) | Q(text__icontains=query)
+                    )[:NUMBER_OF_POSTS]),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'{query!r:<30} индекс: {indexed * 1000:9.2f} ms, '
+                    f'LIKE: {scan * 1000:9.2f} ms'
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, options, vocabulary, frequencies):
+        author = User.objects.create(username='bench_search')
+        category = Category.objects.create(
+            title='Bench', description='Bench', slug='bench-search'
+        )
+        location = Location.objects.create(name='Bench')
+        start = timezone.now() - timedelta(days=1)
+        batch_size = options['batch_size']
+        # На SQLite bulk_create не возвращает id, поэтому они задаются явно.
+        first_id = (Post.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        for offset in range(0, options['posts'], batch_size):
+            posts = Post.objects.bulk_create(
+                Post(
+                    id=first_id + index,
+                    title=' '.join(
+                        random.choices(vocabulary, frequencies, k=4)
+                    ),
+                    text=' '.join(random.choices(
+                        vocabulary, frequencies, k=options['words']
+                    )),
+                    pub_date=start - timedelta(minutes=index),
+                    author=author,
+                    category=category,
+                    location=location,
+                )
+                for index in range(
+                    offset, min(offset + batch_size, options['posts'])
+                )
+            )
+            # bulk_create не вызывает сигналы: индекс строится здесь.
+            insert_entries(build_entries([
+                {'id': post.pk, 'title': post.title, 'text': post.text}
+                for post in posts
+            ]))
+
+    @staticmethod
+    def measure(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from blog.cache import invalidate
+from blog.images import build_derivatives, strip_exif
+from blog.models import Post
+from blog.timelines import sync_post_fields
+
+
+def _build(pk, name):
+    name = strip_exif(name)
+    return pk, name, build_derivatives(name)
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии изображений постов, у которых их ещё нет, '
+        'и убирает из оригиналов EXIF. Работает в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить копии и для уже обработанных изображений.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(image_width__isnull=True)
+        built = failed = 0
+        last_pk = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            while True:
+                # Порции по ключу: результат не держится в памяти целиком,
+                # а запись не пересекается с открытым курсором SQLite.
+                chunk = list(posts.filter(pk__gt=last_pk).values_list(
+                    'pk', 'image'
+                )[:options['batch_size']])
+                if not chunk:
+                    break
+                last_pk = chunk[-1][0]
+                futures = [
+                    executor.submit(_build, pk, name) for pk, name in chunk
+                ]
+                processed = []
+                for future in as_completed(futures):
+                    try:
+                        pk, name, width = future.result()
+                    except Exception as error:
+                        failed += 1
+                        self.stderr.write(f'{type(error).__name__}: {error}')
+                        continue
+                    processed.append(Post(
+                        pk=pk, image=name, image_width=width, updated_at=now()
+                    ))
+                Post.objects.bulk_update(
+                    processed, ('image', 'image_width', 'updated_at')
+                )
+                sync_post_fields(
+                    ('image', 'image_width'), [post.pk for post in processed]
+                )
+                built += len(processed)
+        if built:
+            invalidate('all')
+        self.stdout.write(f'Обработано: {built}, с ошибками: {failed}.')
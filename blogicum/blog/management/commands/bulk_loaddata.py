@@ -0,0 +1,227 @@
+import gzip
+import time
+from collections import Counter, defaultdict
+
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from blog.cache import invalidate
+from blog.models import Comment, Post
+from blog.serialization import FixtureError, iter_fixture
+
+
+class BulkLoader:
+    """Копит объекты фикстуры по моделям и вставляет их пачками.
+
+    Вставка идёт в режиме raw, как у loaddata: значения auto_now_add
+    и прочие поля берутся из фикстуры, сигналы не отправляются.
+    """
+
+    def __init__(self, using, batch_size):
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        self.pending = defaultdict(list)
+        self.deferred = []
+        self.loaded = Counter()
+
+    def add(self, deserialized):
+        model = type(deserialized.object)
+        self.pending[model].append(deserialized)
+        if deserialized.deferred_fields:
+            self.deferred.append(deserialized)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush_all(self):
+        # Остатки вставляются от независимых моделей к зависимым.
+        for model in serializers.sort_dependencies(
+            [(None, list(self.pending))], allow_cycles=True
+        ):
+            self.flush(model)
+        for deserialized in self.deferred:
+            deserialized.save_deferred_fields(using=self.using)
+
+    def flush(self, model):
+        batch = self.pending.pop(model, [])
+        if not batch:
+            return
+        objs = [deserialized.object for deserialized in batch]
+        self._fill_auto_dates(model, objs)
+        manager = model._base_manager.db_manager(self.using)
+        existing = set(manager.filter(
+            pk__in=[obj.pk for obj in objs]
+        ).values_list('pk', flat=True))
+        self._insert(model, [obj for obj in objs if obj.pk not in existing])
+        self._update(model, [obj for obj in objs if obj.pk in existing])
+        self._set_m2m(model, batch)
+        self.loaded[model] += len(objs)
+
+    def _insert(self, model, objs):
+        fields = model._meta.local_concrete_fields
+        quote = self.connection.ops.quote_name
+        self._execute_many(
+            'INSERT INTO {} ({}) VALUES ({})'.format(
+                quote(model._meta.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join(['%s'] * len(fields)),
+            ),
+            fields,
+            objs,
+        )
+
+    def _update(self, model, objs):
+        # Объекты, которые уже есть в базе, перезаписываются, как в loaddata.
+        pk = model._meta.pk
+        fields = [
+            field for field in model._meta.local_concrete_fields
+            if not field.primary_key
+        ]
+        quote = self.connection.ops.quote_name
+        self._execute_many(
+            'UPDATE {} SET {} WHERE {} = %s'.format(
+                quote(model._meta.db_table),
+                ', '.join(f'{quote(field.column)} = %s' for field in fields),
+                quote(pk.column),
+            ),
+            [*fields, pk],
+            objs,
+        )
+
+    def _execute_many(self, sql, fields, objs):
+        # Один подготовленный запрос на всю пачку через executemany:
+        # сборка SQL компилятором ORM для каждой строки дороже записи.
+        if not objs:
+            return
+        rows = [
+            [
+                field.get_db_prep_save(
+                    getattr(obj, field.attname), self.connection
+                )
+                for field in fields
+            ]
+            for obj in objs
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    @staticmethod
+    def _fill_auto_dates(model, objs):
+        # Фикстуры, выгруженные до появления поля, его не содержат.
+        now = timezone.now()
+        auto_fields = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+        ]
+        for obj in objs:
+            for field in auto_fields:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+
+    def _set_m2m(self, model, batch):
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            rows = [
+                through(**{
+                    f'{source}_id': deserialized.object.pk,
+                    f'{target}_id': value,
+                })
+                for deserialized in batch
+                for value in (deserialized.m2m_data or {}).get(field.name, ())
+            ]
+            touched = [
+                deserialized.object.pk for deserialized in batch
+                if field.name in (deserialized.m2m_data or {})
+            ]
+            if not touched:
+                continue
+            through._base_manager.db_manager(self.using).filter(
+                **{f'{source}__in': touched}
+            ).delete()
+            through._base_manager.db_manager(self.using).bulk_create(
+                rows, batch_size=self.batch_size
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загружает JSON-фикстуру Django (можно .json.gz): читает её '
+        'потоком и вставляет объекты пачками в одной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--ignorenonexistent',
+            '-i',
+            action='store_true',
+            help='Пропускать поля, которых нет в моделях.',
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Не пересчитывать счётчики комментариев и поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        loader = BulkLoader(using, options['batch_size'])
+        opener = gzip.open if options['fixture'].endswith('.gz') else open
+        start = time.perf_counter()
+        try:
+            with opener(options['fixture'], 'rb') as stream, \
+                    transaction.atomic(using=using):
+                # Как и loaddata: внешние ключи проверяются один раз
+                # в конце, поэтому порядок записей в файле не важен.
+                with connection.constraint_checks_disabled():
+                    for deserialized in serializers.deserialize(
+                        'python',
+                        iter_fixture(stream),
+                        using=using,
+                        ignorenonexistent=options['ignorenonexistent'],
+                        handle_forward_references=True,
+                    ):
+                        loader.add(deserialized)
+                    loader.flush_all()
+                connection.check_constraints(table_names=[
+                    model._meta.db_table for model in loader.loaded
+                ])
+                self._reset_sequences(connection, list(loader.loaded))
+        except (OSError, FixtureError, DeserializationError) as error:
+            raise CommandError(f'{options["fixture"]}: {error}') from error
+        elapsed = time.perf_counter() - start
+        for model, total in loader.loaded.items():
+            self.stdout.write(f'{model._meta.label}: {total}')
+        total = sum(loader.loaded.values())
+        self.stdout.write(
+            f'Загружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} в секунду).'
+        )
+        if options['skip_derived']:
+            return
+        if loader.loaded[Post] or loader.loaded[Comment]:
+            call_command('comment_counts', stdout=self.stdout)
+            call_command('rebuild_search_index', stdout=self.stdout)
+            call_command('publish_scheduled', '--all', stdout=self.stdout)
+            call_command('feed_counters', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+        invalidate('all')
+
+    @staticmethod
+    def _reset_sequences(connection, models):
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for line in sequence_sql:
+                    cursor.execute(line)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+from blog.timelines import sync_post_fields
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики комментариев у постов '
+        'одним UPDATE; с --check только проверяет их.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Не исправлять, а завершиться с ошибкой при расхождениях.',
+        )
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=Count('id')
+        ).values('total')
+        actual = Coalesce(Subquery(counts), 0)
+        mismatched = Post.objects.annotate(actual=actual).exclude(
+            comment_count=F('actual')
+        )
+        if options['check']:
+            total = mismatched.count()
+            if total:
+                raise CommandError(
+                    f'Счётчики комментариев расходятся у {total} постов.'
+                )
+            self.stdout.write('Счётчики комментариев в порядке.')
+            return
+        with transaction.atomic():
+            updated = Post.objects.filter(
+                pk__in=mismatched.values('pk')
+            ).update(comment_count=actual)
+            sync_post_fields(('comment_count',))
+        self.stdout.write(f'Исправлено счётчиков: {updated}.')
@@ -0,0 +1,65 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.serialization import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    EXPORT_MODELS,
+    iter_export,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты и комментарии в JSONL, CSV или '
+        'JSON-фикстуру, при необходимости сжимая в gzip.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=sorted(EXPORT_MODELS),
+            help='Модель для выгрузки; по умолчанию все. Можно повторять.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(EXPORT_FORMATS),
+            default='jsonl',
+        )
+        parser.add_argument(
+            '--output',
+            '-o',
+            default='-',
+            help='Файл для записи; «-» — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать вывод; включается сам для файлов *.gz.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        names = options['model'] or list(EXPORT_MODELS)
+        if options['format'] == 'csv' and len(names) != 1:
+            raise CommandError('CSV выгружает одну модель: укажите --model.')
+        output = options['output']
+        chunks = iter_export(
+            [EXPORT_MODELS[name].objects.all() for name in names],
+            options['format'],
+            compress=options['gzip'] or output.endswith('.gz'),
+            chunk_size=options['chunk_size'],
+        )
+        if output == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(output, 'wb') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+        self.stderr.write(f'Выгрузка записана в {output}.')
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from blog.cache import invalidate
+from blog.models import FeedCounter, Post
+
+
+def published_counts():
+    """Число опубликованных постов для каждой ленты."""
+    posts = Post.objects.published().order_by()
+    counts = {'index': posts.count()}
+    for field, family in (
+        ('category__slug', 'category'),
+        ('author__username', 'profile'),
+    ):
+        for key, total in posts.values_list(field).annotate(
+            total=Count('id')
+        ):
+            counts[f'{family}:{key}'] = total
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает таблицу счётчиков постов в лентах, по которой '
+        'пагинатор оценивает число страниц больших лент.'
+    )
+
+    def handle(self, *args, **options):
+        counts = published_counts()
+        with transaction.atomic():
+            FeedCounter.objects.all().delete()
+            FeedCounter.objects.bulk_create(
+                FeedCounter(scope=scope, posts=total)
+                for scope, total in counts.items()
+            )
+        # Закешированные оценки должны уступить новым значениям.
+        invalidate('all')
+        self.stdout.write(f'Пересчитано счётчиков лент: {len(counts)}.')
@@ -0,0 +1,237 @@
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from blog.cache import invalidate
+from blog.images import build_derivatives
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# Столько разных заголовков и текстов генерирует Faker; дальше они
+# повторяются: на миллионах строк Faker стал бы самой медленной частью.
+TEXT_POOL = 500
+
+
+def zipf_weights(total, exponent=1.1):
+    """Веса «популярности»: немногие элементы получают большую часть."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, total + 1)
+    ))
+
+
+def next_id(model):
+    # На SQLite bulk_create не возвращает id, поэтому они задаются явно.
+    return (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, категориями, '
+        'местами, постами, комментариями и изображениями. Популярность '
+        'авторов, категорий и постов распределена по закону Ципфа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=50_000)
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=10,
+            help='Сколько разных изображений создать для постов.',
+        )
+        parser.add_argument(
+            '--image-ratio',
+            type=float,
+            default=0.3,
+            help='Доля постов с изображением.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--skip-index',
+            action='store_true',
+            help='Не строить поисковый индекс.',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Постам нужны авторы: задайте --users.')
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        start = time.perf_counter()
+        titles = [
+            self.fake.sentence(nb_words=4)[:-1] for _ in range(TEXT_POOL)
+        ]
+        texts = [
+            self.fake.paragraph(nb_sentences=5) for _ in range(TEXT_POOL)
+        ]
+        images = self.make_images(options['images'])
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            categories = self.create_categories(options['categories'])
+            locations = self.create_locations(options['locations'])
+            post_ids = list(range(
+                next_id(Post), next_id(Post) + options['posts']
+            ))
+            # Комментарии распределены неравномерно: у немногих постов
+            # их большинство.
+            popular = post_ids[:]
+            self.random.shuffle(popular)
+            commented = self.random.choices(
+                popular,
+                cum_weights=zipf_weights(len(popular)),
+                k=options['comments'],
+            ) if popular else []
+            self.create_posts(
+                options, post_ids, Counter(commented), users, categories,
+                locations, titles, texts, images,
+            )
+            self.create_comments(commented, users, texts)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Пользователей: {len(users)}, категорий: {len(categories)}, '
+            f'мест: {len(locations)}, постов: {len(post_ids)}, '
+            f'комментариев: {len(commented)} за {elapsed:.1f} с.'
+        )
+        if not options['skip_index']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('publish_scheduled', '--all', stdout=self.stdout)
+        call_command('feed_counters', stdout=self.stdout)
+        call_command('rebuild_timelines', stdout=self.stdout)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            # Статистика для планировщика и приблизительных счётчиков.
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        invalidate('all')
+
+    def bulk(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def make_images(self, total):
+        names = []
+        for index in range(total):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (1600, 1000), color).save(buffer, 'JPEG')
+            name = default_storage.save(
+                f'generated_{index}.jpg', ContentFile(buffer.getvalue())
+            )
+            names.append((name, build_derivatives(name)))
+        return names
+
+    def create_users(self, total):
+        # Хеш пароля считается один раз: это самая дорогая операция.
+        password = make_password('password')
+        first_id = next_id(User)
+        users = [
+            User(
+                id=first_id + index,
+                username=f'{self.fake.user_name()}_{first_id + index}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=self.fake.email(),
+                password=password,
+            )
+            for index in range(total)
+        ]
+        self.bulk(User, users)
+        return [user.id for user in users]
+
+    def create_categories(self, total):
+        first_id = next_id(Category)
+        categories = [
+            Category(
+                id=first_id + index,
+                title=self.fake.word().capitalize(),
+                description=self.fake.sentence(),
+                slug=f'category-{first_id + index}',
+                is_published=self.random.random() < 0.9,
+            )
+            for index in range(total)
+        ]
+        self.bulk(Category, categories)
+        return [category.id for category in categories]
+
+    def create_locations(self, total):
+        first_id = next_id(Location)
+        locations = [
+            Location(
+                id=first_id + index,
+                name=self.fake.city(),
+                is_published=self.random.random() < 0.9,
+            )
+            for index in range(total)
+        ]
+        self.bulk(Location, locations)
+        return [location.id for location in locations]
+
+    def create_posts(self, options, post_ids, comment_counts, users,
+                     categories, locations, titles, texts, images):
+        author_weights = zipf_weights(len(users))
+        category_weights = zipf_weights(len(categories))
+        for offset in range(0, len(post_ids), self.batch_size):
+            batch = []
+            for post_id in post_ids[offset:offset + self.batch_size]:
+                image, width = '', None
+                if images and self.random.random() < options['image_ratio']:
+                    image, width = self.random.choice(images)
+                batch.append(Post(
+                    id=post_id,
+                    title=self.random.choice(titles),
+                    text=self.random.choice(texts),
+                    # Каждый двадцатый пост отложен на будущее.
+                    pub_date=self.now + timedelta(
+                        minutes=self.random.randint(-525_600, 26_280)
+                    ),
+                    is_published=self.random.random() < 0.95,
+                    author_id=self.random.choices(
+                        users, cum_weights=author_weights
+                    )[0],
+                    category_id=self.random.choices(
+                        categories, cum_weights=category_weights
+                    )[0] if categories else None,
+                    location_id=self.random.choice(locations + [None]),
+                    image=image,
+                    image_width=width,
+                    # Счётчик заполняется сразу, без отдельного пересчёта.
+                    comment_count=comment_counts[post_id],
+                ))
+            self.bulk(Post, batch)
+
+    def create_comments(self, commented, users, texts):
+        first_id = next_id(Comment)
+        for offset in range(0, len(commented), self.batch_size):
+            self.bulk(Comment, [
+                Comment(
+                    id=first_id + offset + index,
+                    post_id=post_id,
+                    author_id=self.random.choice(users),
+                    text=self.random.choice(texts),
+                )
+                for index, post_id in enumerate(
+                    commented[offset:offset + self.batch_size]
+                )
+            ])
@@ -0,0 +1,76 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+
+from blog.loadtest import LOAD_MIX, LoadTest
+
+
+def weight(value):
+    name, _, number = value.partition('=')
+    if name not in LOAD_MIX or not number.isdigit():
+        raise ValueError(value)
+    return name, int(number)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: прогоняет смесь запросов ко всем страницам blog '
+        'через WSGI-приложение в несколько потоков и выводит p50/p95/p99 '
+        'и число SQL-запросов по каждой странице.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--sessions', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--weight',
+            type=weight,
+            action='append',
+            default=[],
+            metavar='NAME=N',
+            help='Изменить долю страницы в смеси, например export=1.',
+        )
+        parser.add_argument(
+            '--json',
+            dest='json_path',
+            help='Сохранить отчёт в JSON-файл.',
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG включён: задержки будут выше, чем в продакшене.'
+            )
+        loadtest = LoadTest(
+            get_internal_wsgi_application(),
+            weights=dict(options['weight']),
+            sessions=options['sessions'],
+            seed=options['seed'],
+        )
+        report = loadtest.run(
+            options['requests'], options['workers'], options['warmup']
+        )
+        if not report['requests']:
+            raise CommandError('Нет данных для запросов: наполните базу.')
+        self.stdout.write(
+            f'{"страница":<18}{"запросов":>9}{"ошибок":>8}'
+            f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}{"SQL":>7}'
+        )
+        for name, row in report['urls'].items():
+            self.stdout.write(
+                f'{name:<18}{row["requests"]:>9}{row["errors"]:>8}'
+                f'{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}'
+                f'{row["p99_ms"]:>10.1f}{row["queries"]:>7.1f}'
+            )
+        self.stdout.write(
+            f'Всего: {report["requests"]} запросов за '
+            f'{report["seconds"]:.1f} с ({report["rps"]:.0f} в секунду).'
+        )
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from blog.constants import SCHEDULE_MAX_SLEEP
+from blog.scheduling import next_due, publish_due
+from blog.visibility import recompute_visibility
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает отложенные посты, дата публикации которых наступила. '
+        'С --loop работает постоянно и просыпается к ближайшей дате.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, ждать следующих публикаций.',
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=getattr(
+                settings, 'BLOG_SCHEDULE_MAX_SLEEP', SCHEDULE_MAX_SLEEP
+            ),
+            help='Дольше стольких секунд не спать: посты, '
+                 'отложенные во время сна, не пропустятся.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать видимость и места всех постов, например '
+                 'после загрузки данных в обход сигналов.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            hidden, shown = recompute_visibility()
+            self.stdout.write(
+                f'Видимость пересчитана: скрыто {hidden}, открыто {shown}.'
+            )
+        while True:
+            published = publish_due()
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}.')
+            if not options['loop']:
+                break
+            due = next_due()
+            delay = options['max_sleep']
+            if due is not None:
+                delay = min(
+                    delay, max((due - timezone.now()).total_seconds(), 0)
+                )
+            close_old_connections()
+            time.sleep(delay)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Comment, Post, SearchEntry
+from blog.search import insert_entries, term_weights
+
+
+def build_entries(posts):
+    """Строки индекса (основа, id поста, вес) для порции постов."""
+    comments = {}
+    for post_id, text in Comment.objects.filter(
+        post_id__in=[post['id'] for post in posts]
+    ).values_list('post_id', 'text').iterator():
+        comments.setdefault(post_id, []).append(text)
+    return [
+        (term, post['id'], weight)
+        for post in posts
+        for term, weight in term_weights(
+            post['title'], post['text'], comments.get(post['id'], ())
+        ).items()
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        indexed = 0
+        last_pk = 0
+        while True:
+            posts = list(Post.objects.filter(pk__gt=last_pk).order_by(
+                'pk'
+            ).values('id', 'title', 'text')[:options['batch_size']])
+            if not posts:
+                break
+            last_pk = posts[-1]['id']
+            with transaction.atomic():
+                SearchEntry.objects.filter(
+                    post_id__in=[post['id'] for post in posts]
+                ).delete()
+                insert_entries(build_entries(posts))
+            indexed += len(posts)
+        self.stdout.write(
+            f'Проиндексировано постов: {indexed} '
+            f'за {time.perf_counter() - start:.1f} с.'
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import TimelineEntry
+from blog.timelines import build_entries, card_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает материализованные ленты категорий и авторов '
+        'по таблице постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        built = 0
+        last_pk = 0
+        TimelineEntry.objects.all().delete()
+        while True:
+            posts = list(card_posts().filter(pk__gt=last_pk).order_by(
+                'pk'
+            )[:options['batch_size']])
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+            with transaction.atomic():
+                built += len(TimelineEntry.objects.bulk_create(
+                    build_entries(posts)
+                ))
+        self.stdout.write(
+            f'Записей в лентах: {built}, '
+            f'за {time.perf_counter() - start:.1f} с.'
+        )
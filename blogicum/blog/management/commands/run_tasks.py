@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from blog.tasks import DatabaseBackend, get_backend
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди фоновых задач в таблице (бэкенд "database").'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунды.',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if not isinstance(backend, DatabaseBackend):
+            raise CommandError(
+                'Воркер нужен только для бэкенда очереди "database".'
+            )
+        done = failed = 0
+        while True:
+            close_old_connections()
+            task = backend.claim()
+            if task is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            if backend.run(task):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(f'Выполнено: {done}, с ошибками: {failed}.')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.db import copy_sqlite_replica, get_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик. Заменяет '
+        'репликацию локально: с --interval копирует по кругу, и реплики '
+        'отстают от основной базы не больше чем на интервал.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Реплики из BLOG_DB_REPLICAS; по умолчанию все.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Повторять копирование раз в столько секунд.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or get_replicas()
+        for alias in aliases:
+            if alias not in get_replicas():
+                raise CommandError(f'{alias} нет в BLOG_DB_REPLICAS.')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} — не база SQLite.')
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                copy_sqlite_replica(alias)
+                self.stdout.write(
+                    f'Реплика {alias} обновлена за '
+                    f'{time.perf_counter() - started:.2f} с.'
+                )
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='Заполняется после построения уменьшенных копий.', null=True, verbose_name='Ширина изображения'),
+        ),
+    ]
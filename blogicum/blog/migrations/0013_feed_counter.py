@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_search_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=200, unique=True, verbose_name='Лента')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+            options={
+                'verbose_name': 'счётчик ленты',
+                'verbose_name_plural': 'Счётчики лент',
+            },
+        ),
+    ]
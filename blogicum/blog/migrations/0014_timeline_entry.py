@@ -0,0 +1,95 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Значение blog.constants.CARD_EXCERPT_WORDS на момент миграции
+CARD_EXCERPT_WORDS = 10
+
+
+def fill_timelines(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    entries = []
+    for post in Post.objects.select_related(
+        'category', 'location', 'author'
+    ).order_by('pk').iterator():
+        category = post.category
+        location = post.location
+        fields = dict(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            title=post.title,
+            excerpt=' '.join(post.text.split()[:CARD_EXCERPT_WORDS + 1]),
+            image=post.image.name or '',
+            image_width=post.image_width,
+            is_published=post.is_published,
+            comment_count=post.comment_count,
+            author_id=post.author_id,
+            author_username=post.author.username,
+            category_id=post.category_id,
+            category_slug=category.slug if category else '',
+            category_title=category.title if category else '',
+            category_is_published=bool(category and category.is_published),
+            location_id=post.location_id,
+            location_name=location.name if location else '',
+            location_is_published=bool(location and location.is_published),
+        )
+        entries.append(TimelineEntry(feed=f'author:{post.author_id}', **fields))
+        if category:
+            entries.append(
+                TimelineEntry(feed=f'category:{category.pk}', **fields)
+            )
+        if len(entries) >= 1000:
+            TimelineEntry.objects.bulk_create(entries)
+            entries = []
+    TimelineEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0013_feed_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=64, verbose_name='Лента')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('excerpt', models.TextField(help_text='Первые слова текста, которые выводит карточка.', verbose_name='Начало текста')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Изображение')),
+                ('image_width', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Ширина изображения')),
+                ('is_published', models.BooleanField(verbose_name='Пост опубликован')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Имя автора')),
+                ('category_slug', models.CharField(blank=True, max_length=50, verbose_name='Идентификатор категории')),
+                ('category_title', models.CharField(blank=True, max_length=256, verbose_name='Категория')),
+                ('category_is_published', models.BooleanField(default=False, verbose_name='Категория опубликована')),
+                ('location_name', models.CharField(blank=True, max_length=256, verbose_name='Местоположение')),
+                ('location_is_published', models.BooleanField(default=False, verbose_name='Местоположение опубликовано')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.category')),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.location')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='blog.post')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Материализованные ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['feed', '-pub_date', 'title', 'post'], name='timeline_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(condition=models.Q(('category_is_published', True), ('is_published', True)), fields=['feed', '-pub_date', 'title', 'post'], name='timeline_public_feed_idx'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:48
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def fill_is_visible(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).update(is_visible=True)
+    TimelineEntry.objects.update(is_visible=Subquery(
+        Post.objects.filter(pk=OuterRef('post_id')).values('is_visible')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_feed_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='timelineentry',
+            name='timeline_public_feed_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Пост опубликован, его категория опубликована и дата публикации наступила. Отложенные посты открывает команда publish_scheduled.', verbose_name='Виден в лентах'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='is_visible',
+            field=models.BooleanField(default=False, verbose_name='Пост виден в лентах'),
+        ),
+        migrations.RunPython(fill_is_visible, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['-pub_date', 'title'], name='post_visible_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_visible', False)), fields=['pub_date'], name='post_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['feed', '-pub_date', 'title', 'post'], name='timeline_public_feed_idx'),
+        ),
+    ]
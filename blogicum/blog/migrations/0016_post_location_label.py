@@ -0,0 +1,53 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_location_label(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Location = apps.get_model('blog', 'Location')
+    TimelineEntry = apps.get_model('blog', 'TimelineEntry')
+    Post.objects.filter(location__is_published=True).update(
+        location_label=Subquery(
+            Location.objects.filter(pk=OuterRef('location_id')).values(
+                'name'
+            )[:1]
+        )
+    )
+    TimelineEntry.objects.filter(location__isnull=False).update(
+        location_label=Subquery(
+            Post.objects.filter(pk=OuterRef('post_id')).values(
+                'location_label'
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='timelineentry',
+            name='location_is_published',
+        ),
+        migrations.RemoveField(
+            model_name='timelineentry',
+            name='location_name',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='location_label',
+            field=models.CharField(blank=True, editable=False, help_text='Название местоположения, если оно опубликовано.', max_length=256, verbose_name='Место в карточке'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='location_label',
+            field=models.CharField(blank=True, max_length=256, verbose_name='Место в карточке'),
+        ),
+        migrations.RunPython(fill_location_label, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,55 @@
+import hashlib
+from collections import Counter
 from django.db import models
+from django.db.models.functions import Greatest
 from core.models import PublishedModel
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
+
+from .constants import CARD_EXCERPT_WORDS, FILTERS_FOR_PUBLIC
+from .images import get_image_sources
 
 
 User = get_user_model()
 
 
+def card_excerpt(text):
+    """Начало текста, которое выводит карточка поста."""
+    # Лишнее слово сохраняет многоточие truncatewords в карточке.
+    return ' '.join(text.split()[:CARD_EXCERPT_WORDS + 1])
+
+
+def post_feed_scopes(username, category_slug):
+    """Ленты, в которые попадает опубликованный пост."""
+    scopes = ['index', f'profile:{username}']
+    if category_slug:
+        scopes.append(f'category:{category_slug}')
+    return scopes
+
+
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        """Посты, видимые всем: опубликованные и с наступившей датой."""
+        return self.filter(is_visible=True)
+
+    def visible_to(self, user):
+        """Опубликованные посты и все посты самого пользователя."""
+        condition = models.Q(is_visible=True)
+        if user.is_authenticated:
+            condition |= models.Q(author=user)
+        return self.filter(condition)
+
+    def due(self, now=None):
+        """Скрытые посты, которые пора показать: дата наступила."""
+        return self.filter(
+            is_visible=False,
+            pub_date__lte=now or timezone.now(),
+            **FILTERS_FOR_PUBLIC,
+        )
+
+
 class Category(PublishedModel):
     """Модель описывающая категории для постов"""
 
@@ -76,16 +119,108 @@ class Post(PublishedModel):
         'Изображение',
         blank=True
     )
+    image_width = models.PositiveSmallIntegerField(
+        'Ширина изображения',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Заполняется после построения уменьшенных копий.',
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    is_visible = models.BooleanField(
+        'Виден в лентах',
+        default=False,
+        editable=False,
+        help_text=(
+            'Пост опубликован, его категория опубликована и дата '
+            'публикации наступила. Отложенные посты открывает '
+            'команда publish_scheduled.'
+        ),
+    )
+    location_label = models.CharField(
+        'Место в карточке',
+        max_length=256,
+        blank=True,
+        editable=False,
+        help_text='Название местоположения, если оно опубликовано.',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date', 'title')
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', 'title'),
+                condition=models.Q(is_visible=True),
+                name='post_visible_feed_idx',
+            ),
+            # Очередь отложенных публикаций для publish_scheduled.
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=False, is_published=True),
+                name='post_scheduled_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', 'title'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', 'title'),
+                name='post_category_feed_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def refresh_visibility(self, now=None):
+        """Пересчитывает is_visible и location_label по связанным объектам."""
+        category = self.category if self.category_id else None
+        location = self.location if self.location_id else None
+        self.is_visible = bool(
+            self.is_published
+            and category is not None and category.is_published
+            and self.pub_date <= (now or timezone.now())
+        )
+        self.location_label = (
+            location.name if location and location.is_published else ''
+        )
+
+    @property
+    def card_version(self):
+        """Отпечаток всех данных карточки поста для кеша её фрагмента.
+
+        Меняется вместе с постом, его категорией, местоположением,
+        автором и числом комментариев.
+        """
+        category = self.category
+        parts = (
+            self.title,
+            card_excerpt(self.text),
+            self.pub_date.isoformat(),
+            self.image.name,
+            self.image_width,
+            self.is_published,
+            self.comment_count,
+            self.author.username,
+            category and (
+                category.slug, category.title, category.is_published
+            ),
+            self.location_label,
+        )
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    def image_sources(self):
+        return get_image_sources(self.image.name, self.image_width)
+
     def get_absolute_url(self):
         return reverse(
             'blog:profile',
@@ -107,8 +242,221 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:20]
+
+
+class Task(models.Model):
+    """Задача фоновой очереди для бэкенда 'database'"""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField('Задача', max_length=256)
+    payload = models.TextField('Аргументы (JSON)')
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    created_at = models.DateTimeField('Добавлена', auto_now_add=True)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='task_status_run_after_idx',
+            ),
+        )
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class SearchEntry(models.Model):
+    """Строка инвертированного индекса: основа слова и её вес в посте"""
+
+    term = models.CharField('Основа слова', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+    )
+    weight = models.PositiveIntegerField('Вес', default=0)
+
+    class Meta:
+        # Покрывающий индекс: поиск читает только его, не обращаясь
+        # к строкам таблицы.
+        indexes = (
+            models.Index(
+                fields=('term', 'post', 'weight'),
+                name='search_entry_term_idx',
+            ),
+        )
+        verbose_name = 'вхождение в поисковый индекс'
+        verbose_name_plural = 'Поисковый индекс'
+
+    def __str__(self):
+        return self.term
+
+
+class FeedCounterQuerySet(models.QuerySet):
+
+    def shift(self, deltas):
+        """Сдвигает счётчики: deltas — {лента: изменение числа постов}."""
+        scopes_by_delta = {}
+        for scope, delta in deltas.items():
+            if delta:
+                scopes_by_delta.setdefault(delta, []).append(scope)
+        for delta, scopes in scopes_by_delta.items():
+            self.filter(scope__in=scopes).update(
+                posts=Greatest(models.F('posts') + delta, 0)
+            )
+
+    def shift_posts(self, posts, delta):
+        """Сдвигает на delta за пост счётчики лент постов выборки.
+
+        Вызывается до UPDATE, который меняет их видимость.
+        """
+        deltas = Counter()
+        for username, category_slug, total in posts.order_by().values_list(
+            'author__username', 'category__slug'
+        ).annotate(total=models.Count('id')):
+            for scope in post_feed_scopes(username, category_slug):
+                deltas[scope] += delta * total
+        self.shift(deltas)
+
+
+class FeedCounter(models.Model):
+    """Число опубликованных постов ленты для оценки числа страниц"""
+
+    scope = models.CharField('Лента', max_length=200, unique=True)
+    posts = models.PositiveIntegerField('Постов', default=0)
+    updated_at = models.DateTimeField('Пересчитано', auto_now=True)
+
+    objects = FeedCounterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'счётчик ленты'
+        verbose_name_plural = 'Счётчики лент'
+
+    def __str__(self):
+        return f'{self.scope}: {self.posts}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте категории или автора.
+
+    Хранит поля карточки, чтобы страница ленты читалась одним
+    запросом по индексу, без соединений с категориями, местами
+    и авторами. Поддерживается сигналами, полностью перестраивается
+    командой rebuild_timelines.
+    """
+
+    feed = models.CharField('Лента', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+    title = models.CharField('Заголовок', max_length=256)
+    excerpt = models.TextField(
+        'Начало текста',
+        help_text='Первые слова текста, которые выводит карточка.',
+    )
+    image = models.CharField('Изображение', max_length=100, blank=True)
+    image_width = models.PositiveSmallIntegerField(
+        'Ширина изображения', null=True, blank=True
+    )
+    is_published = models.BooleanField('Пост опубликован')
+    is_visible = models.BooleanField('Пост виден в лентах', default=False)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев', default=0
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    author_username = models.CharField('Имя автора', max_length=150)
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    category_slug = models.CharField(
+        'Идентификатор категории', max_length=50, blank=True
+    )
+    category_title = models.CharField(
+        'Категория', max_length=256, blank=True
+    )
+    category_is_published = models.BooleanField(
+        'Категория опубликована', default=False
+    )
+    location = models.ForeignKey(
+        Location, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    location_label = models.CharField(
+        'Место в карточке', max_length=256, blank=True
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('feed', '-pub_date', 'title', 'post'),
+                name='timeline_feed_idx',
+            ),
+            # Публичная лента — начало этого индекса.
+            models.Index(
+                fields=('feed', '-pub_date', 'title', 'post'),
+                condition=models.Q(is_visible=True),
+                name='timeline_public_feed_idx',
+            ),
+        )
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Материализованные ленты'
+
+    def __str__(self):
+        return f'{self.feed}: {self.title}'
+
+    def as_post(self):
+        """Пост с полями карточки, собранный без запросов к базе."""
+        post = Post(
+            id=self.post_id,
+            title=self.title,
+            text=self.excerpt,
+            pub_date=self.pub_date,
+            image=self.image,
+            image_width=self.image_width,
+            is_published=self.is_published,
+            comment_count=self.comment_count,
+            location_id=self.location_id,
+            location_label=self.location_label,
+        )
+        post.author = User(id=self.author_id, username=self.author_username)
+        if self.category_id:
+            post.category = Category(
+                id=self.category_id,
+                slug=self.category_slug,
+                title=self.category_title,
+                is_published=self.category_is_published,
+            )
+        return post
@@ -0,0 +1,106 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NPLUSONE = {
+    'ENABLED': True,
+    'THRESHOLD': 5,
+    'RAISE': False,
+}
+
+# Литералы и списки параметров не влияют на «форму» запроса
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def get_config():
+    return {**DEFAULT_NPLUSONE, **getattr(settings, 'BLOG_NPLUSONE', {})}
+
+
+def normalize(sql):
+    """Форма запроса: без литералов и с одним плейсхолдером вместо IN (...)."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql.replace('%s', '?'))
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryShapes:
+    """Счётчик выполненных SELECT-запросов по их форме.
+
+    Запись строк по одной (например, сохранение list_editable)
+    не считается N+1.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            self.counts[normalize(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """Формы, выполненные больше threshold раз, по убыванию."""
+        return [
+            (sql, count) for sql, count in self.counts.most_common()
+            if count > threshold
+        ]
+
+
+@contextmanager
+def track_queries():
+    shapes = QueryShapes()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(shapes))
+        yield shapes
+
+
+def report(repeated, where, raise_error=False):
+    """Сообщает о повторяющихся запросах: исключением или в журнал."""
+    if not repeated:
+        return
+    if raise_error:
+        sql, count = repeated[0]
+        raise NPlusOneError(
+            f'{where}: запрос выполнен {count} раз — вероятно, N+1. {sql}'
+        )
+    for sql, count in repeated:
+        logger.warning(
+            'Повторяющийся запрос (N+1): %s раз в %s', count, where,
+            extra={'nplusone': {'where': where, 'count': count, 'sql': sql}},
+        )
+
+
+class NPlusOneMiddleware:
+    """Ищет в запросе одинаковые по форме SQL-запросы сверх порога."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+        with track_queries() as shapes:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        report(
+            shapes.repeated(config['THRESHOLD']),
+            match.view_name if match else request.path,
+            config['RAISE'],
+        )
+        return response
@@ -0,0 +1,290 @@
+import base64
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import feed_count_key, get_cache
+from .constants import EXACT_COUNT_LIMIT, FEED_COUNT_TIMEOUT
+from .models import FeedCounter
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Сохраняет микросекунды: DjangoJSONEncoder обрезает их до мс."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации: ссылки «вперёд/назад» без COUNT."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинатор по полям сортировки.
+
+    Последнее поле сортировки должно быть уникальным (обычно `id`),
+    иначе порядок между страницами не определён.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.ordering = tuple(
+            ordering or object_list.query.order_by
+            or object_list.model._meta.ordering
+        )
+        self.object_list = object_list.order_by(*self.ordering)
+        self.per_page = int(per_page)
+        self._fields = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj, direction):
+        key = [getattr(obj, name) for name, _ in self._fields]
+        raw = json.dumps([direction, key], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, key = json.loads(raw)
+        except (ValueError, TypeError) as error:
+            raise InvalidCursor(cursor) from error
+        if direction not in ('next', 'prev') or not isinstance(key, list):
+            raise InvalidCursor(cursor)
+        if len(key) != len(self._fields):
+            raise InvalidCursor(cursor)
+        try:
+            key = [
+                self._get_field(name).to_python(value)
+                for (name, _), value in zip(self._fields, key)
+            ]
+        except Exception as error:
+            raise InvalidCursor(cursor) from error
+        return direction, key
+
+    def _get_field(self, name):
+        # Сортировать можно и по аннотации, например по релевантности.
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _seek(self, key, forward):
+        condition = Q()
+        for index, (name, descending) in enumerate(self._fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {
+                prev_name: value
+                for (prev_name, _), value in zip(
+                    self._fields[:index], key[:index]
+                )
+            }
+            condition |= Q(**equal, **{f'{name}__{lookup}': key[index]})
+        return condition
+
+    def page(self, cursor=None):
+        if not cursor:
+            objects = list(self.object_list[:self.per_page + 1])
+            return self._build_page(objects, forward=True, has_cursor=False)
+        direction, key = self.decode_cursor(cursor)
+        forward = direction == 'next'
+        queryset = self.object_list.filter(self._seek(key, forward))
+        if not forward:
+            queryset = queryset.reverse()
+        objects = list(queryset[:self.per_page + 1])
+        return self._build_page(objects, forward, has_cursor=True)
+
+    def get_page(self, cursor=None):
+        """Как `page()`, но некорректный курсор даёт первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def _build_page(self, objects, forward, has_cursor):
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if not forward:
+            objects.reverse()
+        has_next = has_more if forward else True
+        has_previous = has_cursor if forward else has_more
+        next_cursor = previous_cursor = None
+        if objects and has_next:
+            next_cursor = self.encode_cursor(objects[-1], 'next')
+        if objects and has_previous:
+            previous_cursor = self.encode_cursor(objects[0], 'prev')
+        return CursorPage(objects, self, next_cursor, previous_cursor)
+
+
+def approximate_count(model, using='default'):
+    """Число строк таблицы по статистике планировщика или None.
+
+    SQLite хранит его в sqlite_stat1 после ANALYZE, PostgreSQL —
+    в pg_class.reltuples после VACUUM/ANALYZE.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        # Первое число в stat любой строки таблицы — число её строк;
+        # без ANALYZE таблицы sqlite_stat1 нет, и запрос падает.
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+        'postgresql': (
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class ApproximateCountPaginator(Paginator):
+    """Для большой таблицы без фильтров берёт число строк из статистики.
+
+    Отфильтрованные списки и небольшие таблицы считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = approximate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class ApproximatePage(Page):
+    """Страница при оценочном числе постов: «вперёд» — по факту выборки."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self._has_more = has_more
+
+    def has_next(self):
+        return self._has_more
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты с кешированным числом постов.
+
+    Число хранится в кеше лент и сбрасывается вместе с её страницами
+    при публикации и снятии постов, а также не дольше
+    BLOG_FEED_COUNT_TIMEOUT секунд. Если по таблице FeedCounter лента
+    больше EXACT_COUNT_LIMIT, точный COUNT не выполняется: число
+    страниц оценочное (`approximate`), ссылка «вперёд» строится
+    по наличию следующего поста.
+    """
+
+    def __init__(self, object_list, per_page, scopes, public=True, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scopes = scopes
+        self.public = public
+
+    @cached_property
+    def _count(self):
+        cache = get_cache()
+        key = feed_count_key(
+            self.scopes, 'public' if self.public else 'owner'
+        )
+        cached = cache.get(key)
+        if cached is None:
+            cached = self._estimate() or (super().count, False)
+            cache.set(key, cached, getattr(
+                settings, 'BLOG_FEED_COUNT_TIMEOUT', FEED_COUNT_TIMEOUT
+            ))
+        return cached
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def approximate(self):
+        return self._count[1]
+
+    def _estimate(self):
+        if not self.public:
+            return None
+        estimate = FeedCounter.objects.filter(
+            scope=self.scopes[-1]
+        ).values_list('posts', flat=True).first()
+        if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+            return estimate, True
+        return None
+
+    def validate_number(self, number):
+        if not self.approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не является числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.approximate:
+            return super().page(number)
+        # За оценочным концом ленты страница просто пуста.
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return ApproximatePage(
+            objects[:self.per_page], number, self,
+            len(objects) > self.per_page,
+        )
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from .instrumentation import measure
+
+DEFAULT_PROFILING = {
+    'SAMPLE_RATE': 0.01,
+    'BUFFER_SIZE': 1000,
+    'METRICS_TOKEN': '',
+}
+
+
+def get_config():
+    return {**DEFAULT_PROFILING, **getattr(settings, 'BLOG_PROFILING', {})}
+
+
+class ProfileBuffer:
+    """Последние замеры запросов и накопленные суммы по обработчикам."""
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=size)
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals[record['view']]
+            totals['count'] += 1
+            for key in ('total', 'queries', 'query_time', 'template_time'):
+                totals[key] += record[key]
+
+    def records(self):
+        with self._lock:
+            return list(reversed(self._records))
+
+    def totals(self):
+        with self._lock:
+            return {view: dict(totals)
+                    for view, totals in sorted(self._totals.items())}
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        size = get_config()['BUFFER_SIZE']
+        if _buffer is None or _buffer._records.maxlen != size:
+            _buffer = ProfileBuffer(size)
+        return _buffer
+
+
+class ProfilingMiddleware:
+    """Замеряет долю запросов: SQL, шаблоны, общее время, обработчик.
+
+    Работает и при выключенном DEBUG. Потоковые ответы замеряются
+    до начала отдачи тела.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= get_config()['SAMPLE_RATE']:
+            return self.get_response(request)
+        with measure() as measurement:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        get_buffer().add({
+            'time': time.time(),
+            'view': match.view_name if match else '',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **measurement.as_dict(),
+        })
+        return response
+
+
+def _labels(**labels):
+    return '{' + ','.join(
+        f'{name}="{value}"' for name, value in labels.items()
+    ) + '}'
+
+
+def prometheus_metrics(extra=()):
+    """Метрики в текстовом формате Prometheus.
+
+    extra — тройки (имя, тип, значение) для метрик без меток.
+    """
+    lines = []
+    metrics = (
+        ('count', 'blog_profiled_requests_total', 'counter',
+         'Замеренные запросы.'),
+        ('total', 'blog_request_seconds_total', 'counter',
+         'Суммарное время замеренных запросов.'),
+        ('query_time', 'blog_sql_seconds_total', 'counter',
+         'Суммарное время SQL-запросов.'),
+        ('queries', 'blog_sql_queries_total', 'counter',
+         'Число SQL-запросов.'),
+        ('template_time', 'blog_template_seconds_total', 'counter',
+         'Суммарное время отрисовки шаблонов.'),
+    )
+    totals = get_buffer().totals()
+    for key, name, metric_type, help_text in metrics:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for view, values in totals.items():
+            lines.append(f'{name}{_labels(view=view)} {values[key]:g}')
+    for name, metric_type, value in extra:
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.append(f'{name} {value:g}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,106 @@
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import get_cache, invalidate
+from .constants import SCHEDULE_CACHE_TIMEOUT, SCHEDULE_LOCK_TIMEOUT
+from .db import replica_reads
+from .models import FeedCounter, Post, TimelineEntry, post_feed_scopes
+from .tasks import task
+
+NEXT_DUE_KEY = 'blog:schedule:next'
+PUBLISH_LOCK_KEY = 'blog:schedule:publishing'
+
+
+def next_due():
+    """Дата ближайшей отложенной публикации или None."""
+    # ORDER BY с LIMIT идёт по индексу post_scheduled_idx и
+    # останавливается на первой подходящей строке, MIN с JOIN — нет.
+    return Post.objects.filter(
+        is_visible=False, is_published=True, category__is_published=True
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+
+
+def reschedule():
+    """Забывает закешированную дату: её пересчитает следующая проверка."""
+    get_cache().delete(NEXT_DUE_KEY)
+
+
+def publish_due(now=None):
+    """Показывает посты, дата публикации которых наступила.
+
+    Флаг is_visible меняется одним UPDATE в постах и в их записях
+    лент; сдвигаются счётчики и сбрасываются кеши затронутых лент.
+    Возвращает число постов.
+    """
+    with transaction.atomic():
+        due = list(Post.objects.due(now).values_list(
+            'id', 'author__username', 'category__slug'
+        ))
+        ids = [post_id for post_id, _, _ in due]
+        if ids:
+            FeedCounter.objects.shift(Counter(
+                scope
+                for _, username, slug in due
+                for scope in post_feed_scopes(username, slug)
+            ))
+            Post.objects.filter(pk__in=ids).update(
+                is_visible=True, updated_at=timezone.now()
+            )
+            TimelineEntry.objects.filter(post_id__in=ids).update(
+                is_visible=True
+            )
+    if ids:
+        invalidate('index', *{
+            scope
+            for _, username, slug in due
+            for scope in (f'profile:{username}', f'category:{slug}')
+        })
+    reschedule()
+    return len(ids)
+
+
+@task()
+def publish_due_task():
+    """Публикация наступивших постов по сигналу check_due."""
+    try:
+        publish_due()
+    finally:
+        get_cache().delete(PUBLISH_LOCK_KEY)
+
+
+def check_due():
+    """Ставит задачу публикации, если пришло время ближайшего поста.
+
+    Обычно это одно чтение из кеша: запрос к базе выполняется, только
+    когда дата неизвестна. Сама страница ничего не пишет: публикует
+    publish_scheduled или очередь задач, а cache.add() пропускает
+    к постановке задачи только один из одновременных запросов.
+    """
+    cache = get_cache()
+    cached = cache.get(NEXT_DUE_KEY)
+    if cached is None:
+        cached = (next_due(),)
+        cache.set(NEXT_DUE_KEY, cached, getattr(
+            settings, 'BLOG_SCHEDULE_CACHE_TIMEOUT', SCHEDULE_CACHE_TIMEOUT
+        ))
+    due, = cached
+    if due is None or due > timezone.now():
+        return
+    if cache.add(PUBLISH_LOCK_KEY, True, SCHEDULE_LOCK_TIMEOUT):
+        # Постановка задачи — служебная запись: она не закрепляет
+        # сессию читателя за основной базой.
+        with replica_reads(enabled=False):
+            publish_due_task.delay()
+
+
+def publishes_due(view):
+    """Перед ответом страницы с постами будит публикацию отложенных."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        check_due()
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,204 @@
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+import snowballstemmer
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .cache import get_cache
+from .constants import (
+    NUMBER_OF_POSTS,
+    SEARCH_MAX_TERMS,
+    SEARCH_ORDERING,
+    SEARCH_TITLE_WEIGHT,
+)
+from .models import Comment, Post, SearchEntry
+from .paginators import CursorPaginator
+from .utils import search_params
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+
+STOP_WORDS = frozenset((
+    'без', 'бы', 'во', 'вот', 'все', 'да', 'для', 'до', 'его', 'ее', 'же',
+    'за', 'из', 'или', 'им', 'их', 'как', 'ко', 'ли', 'мы', 'на', 'над',
+    'не', 'нет', 'ни', 'но', 'об', 'он', 'она', 'они', 'от', 'по', 'под',
+    'при', 'со', 'так', 'там', 'то', 'уже', 'что', 'это', 'an', 'and', 'in',
+    'of', 'on', 'or', 'the', 'to',
+))
+
+DOCUMENTS_KEY = 'blog:search:documents'
+DOCUMENTS_TIMEOUT = 3600
+
+_stemmers = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    language = 'russian' if CYRILLIC_RE.search(word) else 'english'
+    return _stemmers[language].stemWord(word)[:64]
+
+
+def tokenize(text):
+    """Основы слов текста: нижний регистр, «ё» как «е», без стоп-слов."""
+    return [
+        stem(word)
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def term_weights(title, text, comments=()):
+    weights = Counter()
+    for term in tokenize(title):
+        weights[term] += SEARCH_TITLE_WEIGHT
+    weights.update(tokenize(text))
+    for comment in comments:
+        weights.update(tokenize(comment))
+    return weights
+
+
+def index_post(post_id):
+    """Полностью перестраивает записи индекса одного поста."""
+    post = Post.objects.filter(pk=post_id).values('title', 'text').first()
+    if post is None:
+        return
+    weights = term_weights(
+        post['title'],
+        post['text'],
+        Comment.objects.filter(post_id=post_id).values_list(
+            'text', flat=True
+        ).iterator(),
+    )
+    with transaction.atomic():
+        SearchEntry.objects.filter(post_id=post_id).delete()
+        SearchEntry.objects.bulk_create(
+            SearchEntry(term=term, post_id=post_id, weight=weight)
+            for term, weight in weights.items()
+        )
+
+
+def insert_entries(rows):
+    """Вставляет кортежи (основа, id поста, вес) одним executemany.
+
+    Для массовой переиндексации: экземпляры моделей и компилятор ORM
+    на миллионах строк обходятся дороже самой вставки.
+    """
+    opts = SearchEntry._meta
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}, {}, {}) VALUES (%s, %s, %s)'.format(
+        quote(opts.db_table),
+        *(quote(opts.get_field(name).column)
+          for name in ('term', 'post', 'weight')),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def shift_terms(post_id, added='', removed=''):
+    """Добавляет в индекс поста слова одного текста и убирает другого.
+
+    Так комментарий учитывается без перечитывания всех комментариев
+    поста.
+    """
+    delta = Counter(tokenize(added))
+    delta.subtract(tokenize(removed))
+    delta = {term: weight for term, weight in delta.items() if weight}
+    if not delta:
+        return
+    existing = set(SearchEntry.objects.filter(
+        post_id=post_id, term__in=delta
+    ).values_list('term', flat=True))
+    # Один UPDATE на каждое различное значение сдвига веса.
+    by_weight = defaultdict(list)
+    for term in existing:
+        by_weight[delta[term]].append(term)
+    for weight, terms in by_weight.items():
+        SearchEntry.objects.filter(post_id=post_id, term__in=terms).update(
+            weight=Greatest(F('weight') + weight, 0)
+        )
+    if any(weight < 0 for weight in by_weight):
+        SearchEntry.objects.filter(post_id=post_id, weight=0).delete()
+    new = [
+        SearchEntry(term=term, post_id=post_id, weight=weight)
+        for term, weight in delta.items()
+        if weight > 0 and term not in existing
+    ]
+    if new:
+        SearchEntry.objects.bulk_create(new)
+
+
+def _documents():
+    return get_cache().get_or_set(
+        DOCUMENTS_KEY, Post.objects.count, DOCUMENTS_TIMEOUT
+    )
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_TERMS]
+
+
+def matching_post_ids(terms):
+    """Подзапрос id постов, в индексе которых есть все термины."""
+    return SearchEntry.objects.filter(term__in=terms).values(
+        'post'
+    ).annotate(matched=Count('*')).filter(matched=len(terms)).values('post')
+
+
+def search_posts(posts, query):
+    """Посты, содержащие все слова запроса, с релевантностью `rank`.
+
+    Релевантность — сумма весов слов в посте, умноженных на их
+    обратную документную частоту (tf-idf). Из полей поста выбирается
+    только id: группировка по всем колонкам обходится дороже.
+    """
+    terms = query_terms(query)
+    nothing = posts.annotate(rank=Value(0.0, FloatField())).none()
+    if not terms:
+        return nothing
+    frequencies = dict(SearchEntry.objects.filter(
+        term__in=terms
+    ).values_list('term').annotate(total=Count('id')).order_by())
+    if len(frequencies) < len(terms):
+        return nothing
+    documents = max(_documents(), max(frequencies.values()))
+    # Кандидаты отбираются по спискам вхождений, а не перебором постов.
+    matching = matching_post_ids(terms)
+    rank = Sum(Case(
+        *[
+            When(
+                search_entries__term=term,
+                then=F('search_entries__weight') * Value(
+                    math.log(1 + documents / frequency)
+                ),
+            )
+            for term, frequency in frequencies.items()
+        ],
+        output_field=FloatField(),
+    ))
+    return posts.filter(
+        pk__in=matching, search_entries__term__in=terms
+    ).only('id').annotate(rank=rank)
+
+
+def search_page(query, cursor=None):
+    """Страница результатов поиска по опубликованным постам."""
+    paginator = CursorPaginator(
+        search_posts(Post.objects.published(), query),
+        NUMBER_OF_POSTS,
+        SEARCH_ORDERING,
+    )
+    page = paginator.get_page(cursor)
+    posts = search_params(Post.objects, public=False).in_bulk(
+        [post.id for post in page]
+    )
+    for post in page:
+        posts[post.id].rank = post.rank
+    page.object_list = [posts[post.id] for post in page]
+    return page
@@ -0,0 +1,204 @@
+import codecs
+import csv
+import json
+import zlib
+
+from .models import Comment, Post
+from .paginators import CursorEncoder
+
+CHUNK_SIZE = 1 << 16
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_MODELS = {
+    'post': Post,
+    'comment': Comment,
+}
+
+# Формат: (MIME-тип, расширение файла)
+EXPORT_FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+    'json': ('application/json', 'json'),
+}
+
+SEPARATORS = ' \t\r\n,'
+
+
+class FixtureError(ValueError):
+    pass
+
+
+class _Reader:
+    """Буфер над потоком, который подчитывает данные по мере разбора."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        # Многобайтный символ может оказаться на границе двух порций.
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def read_more(self):
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        if isinstance(chunk, bytes):
+            chunk = self.text.decode(chunk, final=self.eof)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def next_char(self):
+        """Первый значимый символ; пробелы и запятые пропускаются."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in SEPARATORS
+            ):
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                return self.buffer[self.position:self.position + 1]
+            self.read_more()
+
+    def decode(self, decoder):
+        while True:
+            try:
+                value, self.position = decoder.raw_decode(
+                    self.buffer, self.position
+                )
+                return value
+            except json.JSONDecodeError as error:
+                if self.eof:
+                    raise FixtureError(
+                        f'Некорректный JSON: {error.msg}.'
+                    ) from error
+                self.read_more()
+
+
+def iter_fixture(stream, chunk_size=CHUNK_SIZE):
+    """Записи JSON-фикстуры Django по одной, без чтения файла целиком.
+
+    Фикстура — массив объектов; каждый объект разбирается, как только
+    он целиком попал в буфер.
+    """
+    reader = _Reader(stream, chunk_size)
+    first = reader.next_char()
+    if not first:
+        return
+    if first != '[':
+        raise FixtureError('Фикстура должна быть JSON-массивом.')
+    reader.position += 1
+    decoder = json.JSONDecoder()
+    while True:
+        char = reader.next_char()
+        if char == ']':
+            return
+        if not char:
+            raise FixtureError('Фикстура оборвана: нет закрывающей «]».')
+        record = reader.decode(decoder)
+        if not isinstance(record, dict):
+            raise FixtureError('Запись фикстуры должна быть объектом.')
+        yield record
+
+
+def _dumps(value):
+    # В отличие от dumpdata, даты сохраняются с микросекундами.
+    return json.dumps(value, cls=CursorEncoder, ensure_ascii=False)
+
+
+def _rows(queryset, chunk_size):
+    """Поля модели и поток кортежей значений: экземпляры не создаются."""
+    fields = queryset.model._meta.concrete_fields
+    rows = queryset.order_by('pk').values_list(
+        *[field.attname for field in fields]
+    ).iterator(chunk_size=chunk_size)
+    return fields, rows
+
+
+def _jsonl_lines(querysets, chunk_size):
+    for queryset in querysets:
+        label = queryset.model._meta.label_lower
+        fields, rows = _rows(queryset, chunk_size)
+        names = [field.attname for field in fields]
+        for row in rows:
+            yield _dumps({'model': label, **dict(zip(names, row))}) + '\n'
+
+
+class _Line:
+    """Файл для csv.writer, который просто возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(querysets, chunk_size):
+    (queryset,) = querysets
+    writer = csv.writer(_Line())
+    fields, rows = _rows(queryset, chunk_size)
+    yield writer.writerow([field.attname for field in fields])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _fixture_lines(querysets, chunk_size):
+    """Тот же формат, что у dumpdata: файл годится для loaddata."""
+    separator = '[\n'
+    for queryset in querysets:
+        label = queryset.model._meta.label_lower
+        fields, rows = _rows(queryset, chunk_size)
+        names = [field.name for field in fields]
+        pk_index = next(
+            index for index, field in enumerate(fields) if field.primary_key
+        )
+        for row in rows:
+            record = {
+                'model': label,
+                'pk': row[pk_index],
+                'fields': {
+                    name: value
+                    for index, (name, value) in enumerate(zip(names, row))
+                    if index != pk_index
+                },
+            }
+            yield separator + _dumps(record)
+            separator = ',\n'
+    yield '[\n]\n' if separator == '[\n' else '\n]\n'
+
+
+EXPORT_WRITERS = {
+    'jsonl': _jsonl_lines,
+    'csv': _csv_lines,
+    'json': _fixture_lines,
+}
+
+
+def iter_export(querysets, export_format, compress=False,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Выгрузка порциями байтов по CHUNK_SIZE, при compress — в gzip.
+
+    Память не зависит от размера таблиц: строки читаются итератором
+    и сразу уходят в вывод.
+    """
+    if export_format == 'csv' and len(querysets) != 1:
+        raise ValueError('CSV выгружает ровно одну модель.')
+    lines = EXPORT_WRITERS[export_format](querysets, chunk_size)
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size < CHUNK_SIZE:
+            continue
+        chunk = ''.join(buffer).encode()
+        buffer, size = [], 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    chunk = ''.join(buffer).encode()
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
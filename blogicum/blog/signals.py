@@ -0,0 +1,385 @@
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate
+from .images import delete_derivatives
+from .models import (
+    Category,
+    Comment,
+    FeedCounter,
+    Location,
+    Post,
+    TimelineEntry,
+    post_feed_scopes,
+)
+from .scheduling import reschedule
+from .search import shift_terms
+from .tasks import index_post
+from .timelines import refresh_post
+from .visibility import refresh_category, refresh_location
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Location)
+@receiver(pre_save, sender=Post)
+def fill_updated_at(sender, instance, raw=False, **kwargs):
+    # loaddata сохраняет поля как есть, а фикстуры, выгруженные
+    # до появления updated_at, его не содержат.
+    if raw and instance.updated_at is None:
+        instance.updated_at = timezone.now()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # updated_at поста служит валидатором страницы поста вместе
+    # с комментариями, поэтому меняется и при правке комментария.
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+        TimelineEntry.objects.filter(post_id=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now(),
+    )
+    TimelineEntry.objects.filter(
+        post_id=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+
+
+def _feed_scopes(post_id):
+    return [
+        scope
+        for category_slug, username in Post.objects.filter(
+            pk=post_id
+        ).values_list('category__slug', 'author__username')
+        for scope in (
+            'index',
+            f'profile:{username}',
+            category_slug and f'category:{category_slug}',
+        )
+    ]
+
+
+@receiver(pre_save, sender=Post)
+def fill_is_visible(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.refresh_visibility()
+
+
+@receiver(post_save, sender=Post)
+def reschedule_post(sender, instance, raw=False, **kwargs):
+    # Пост из фикстуры со скрытым флагом откроет ближайшая проверка.
+    if raw or not instance.is_visible:
+        reschedule()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw=False, **kwargs):
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'author__username', 'category__slug', 'is_visible'
+    ).first() if instance.pk and not raw else None
+    instance._previous_feed_scopes = (
+        post_feed_scopes(*previous[:2]) if previous else []
+    )
+    instance._previous_visible = bool(previous and previous[2])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Связанные объекты фикстуры могут быть ещё не загружены.
+        invalidate('all')
+        return
+    category = instance.category if instance.category_id else None
+    invalidate(
+        'index',
+        f'profile:{instance.author.username}',
+        category and f'category:{category.slug}',
+        *getattr(instance, '_previous_feed_scopes', ()),
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def shift_feed_counters(sender, instance, raw=False, **kwargs):
+    # Оценка для пагинации: точные значения пересчитывает
+    # команда feed_counters.
+    if raw:
+        return
+    deltas = Counter()
+    if kwargs['signal'] is post_save and instance._previous_visible:
+        deltas.subtract(instance._previous_feed_scopes)
+    if instance.is_visible:
+        scopes = post_feed_scopes(
+            instance.author.username,
+            instance.category.slug if instance.category_id else None,
+        )
+        if kwargs['signal'] is post_save:
+            deltas.update(scopes)
+        else:
+            deltas.subtract(scopes)
+    FeedCounter.objects.shift(deltas)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    instance._previous_image = None
+    if raw or not instance.pk or update_fields and 'image' not in (
+        update_fields
+    ):
+        return
+    instance._previous_image = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def delete_replaced_derivatives(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != instance.image.name:
+        # Файлы удаляются после коммита: откат сохранения
+        # вернул бы посту ссылку на них.
+        transaction.on_commit(partial(delete_derivatives, previous))
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_derivatives(sender, instance, **kwargs):
+    if instance.image:
+        transaction.on_commit(
+            partial(delete_derivatives, instance.image.name)
+        )
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_timelines(sender, instance, raw=False, **kwargs):
+    # Связанные объекты фикстуры могут быть ещё не загружены:
+    # после loaddata ленты перестраивает rebuild_timelines.
+    if not raw:
+        refresh_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(
+    sender, instance, created=True, raw=False, **kwargs
+):
+    # В карточках ленты выводится только число комментариев.
+    if raw:
+        invalidate('all')
+    elif created:
+        invalidate(*_feed_scopes(instance.post_id))
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    previous = Category.objects.filter(pk=instance.pk).values_list(
+        'slug', 'is_published'
+    ).first() if instance.pk else None
+    instance._previous_slug, instance._previous_published = (
+        previous or (None, None)
+    )
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_visibility(sender, instance, created, **kwargs):
+    # Итог каскада показывает админка (VisibilityCascadeAdmin).
+    if not created and (
+        instance._previous_published != instance.is_published
+    ):
+        instance._cascade = refresh_category(instance)
+
+
+@receiver(pre_delete, sender=Category)
+def hide_deleted_category_posts(sender, instance, **kwargs):
+    # Пост без категории не публикуется: скрываем посты, пока
+    # удаление ещё не обнулило их category_id.
+    instance._cascade = refresh_category(instance, is_published=False)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, instance, **kwargs):
+    previous_slug = getattr(instance, '_previous_slug', None)
+    invalidate(
+        'index',
+        'profile',
+        f'category:{instance.slug}',
+        previous_slug and f'category:{previous_slug}',
+    )
+
+
+@receiver(post_save, sender=Category)
+def update_category_timelines(sender, instance, **kwargs):
+    TimelineEntry.objects.filter(category=instance).update(
+        category_slug=instance.slug,
+        category_title=instance.title,
+        category_is_published=instance.is_published,
+    )
+
+
+@receiver(post_delete, sender=Category)
+def delete_category_timeline(sender, instance, **kwargs):
+    TimelineEntry.objects.filter(feed=f'category:{instance.pk}').delete()
+
+
+def _posts_scopes(posts):
+    """Области лент, в которые попадают посты из выборки."""
+    scopes = set()
+    for category_slug, username in posts.values_list(
+        'category__slug', 'author__username'
+    ).order_by().distinct():
+        scopes.update(('index', f'profile:{username}'))
+        if category_slug:
+            scopes.add(f'category:{category_slug}')
+    return scopes
+
+
+@receiver(pre_save, sender=Location)
+def remember_location_state(sender, instance, **kwargs):
+    instance._previous_state = Location.objects.filter(
+        pk=instance.pk
+    ).values_list('name', 'is_published').first() if instance.pk else None
+
+
+@receiver(post_save, sender=Location)
+def invalidate_location_feeds(sender, instance, created, **kwargs):
+    # У новой локации ещё нет постов, а её прочие поля
+    # в карточках не выводятся.
+    if not created and instance._previous_state != (
+        instance.name, instance.is_published
+    ):
+        invalidate(*_posts_scopes(Post.objects.filter(location=instance)))
+
+
+@receiver(pre_delete, sender=Location)
+def invalidate_deleted_location_feeds(sender, instance, **kwargs):
+    # После удаления посты уже не ссылаются на локацию.
+    invalidate(*_posts_scopes(Post.objects.filter(location=instance)))
+
+
+@receiver(pre_delete, sender=Location)
+def clear_deleted_location_labels(sender, instance, **kwargs):
+    # Название в карточках денормализовано: SET_NULL его не сотрёт.
+    instance._cascade = refresh_location(instance, is_published=False)
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_labels(sender, instance, created, **kwargs):
+    if not created and instance._previous_state != (
+        instance.name, instance.is_published
+    ):
+        instance._cascade = refresh_location(instance)
+
+
+# Поля пользователя, которые выводятся на страницах лент.
+PROFILE_FIELDS = ('username', 'first_name', 'last_name', 'is_staff')
+
+
+def _profile(user):
+    return tuple(getattr(user, name) for name in PROFILE_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_state(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if update_fields and not set(update_fields) & set(PROFILE_FIELDS):
+        # Вход пользователя обновляет только last_login.
+        instance._previous_profile = _profile(instance)
+        return
+    instance._previous_profile = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*PROFILE_FIELDS).first() if instance.pk and not raw else None
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        return
+    previous = getattr(instance, '_previous_profile', None)
+    if previous == _profile(instance):
+        return
+    scopes = {f'profile:{instance.username}'}
+    if previous:
+        scopes.add(f'profile:{previous[0]}')
+    if not previous or previous[0] != instance.username:
+        # Имя автора выводится в карточках всех его постов.
+        scopes |= _posts_scopes(Post.objects.filter(author=instance))
+    invalidate(*scopes)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_feeds(sender, instance, **kwargs):
+    # Ленты с постами пользователя сбрасывает удаление самих постов.
+    invalidate(f'profile:{instance.username}')
+
+
+@receiver(post_save, sender=User)
+def update_author_timelines(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'username' not in update_fields:
+        return
+    TimelineEntry.objects.filter(author=instance).update(
+        author_username=instance.username
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(
+    sender, instance, update_fields=None, raw=False, **kwargs
+):
+    if raw or update_fields and not {'title', 'text'} & set(update_fields):
+        return
+    index_post.delay(instance.pk)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_text(sender, instance, raw=False, **kwargs):
+    instance._previous_text = None
+    if instance.pk and not raw:
+        instance._previous_text = Comment.objects.filter(
+            pk=instance.pk
+        ).values_list('text', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def index_comment_text(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    shift_terms(
+        instance.post_id,
+        added=instance.text,
+        removed=getattr(instance, '_previous_text', None) or '',
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment_text(sender, instance, **kwargs):
+    shift_terms(instance.post_id, removed=instance.text)
@@ -0,0 +1,412 @@
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial, wraps
+
+import django
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import search
+from .images import build_derivatives, strip_exif
+from .models import Post, Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASKS = {
+    'BACKEND': 'thread',
+    'WORKERS': 2,
+    'MAX_RETRIES': 3,
+    'RETRY_DELAY': 5,
+    'LEASE': 300,
+}
+
+
+def get_config():
+    return {**DEFAULT_TASKS, **getattr(settings, 'BLOG_TASKS', {})}
+
+
+class TaskMetrics:
+    """Счётчики очереди текущего процесса: глубина, ошибки, задержки."""
+
+    def __init__(self, samples=1000):
+        self._lock = threading.Lock()
+        self._wait = deque(maxlen=samples)
+        self._run = deque(maxlen=samples)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.enqueued = self.succeeded = self.failed = self.retried = 0
+            self.depth = 0
+            self._wait.clear()
+            self._run.clear()
+
+    def on_enqueue(self):
+        with self._lock:
+            self.enqueued += 1
+            self.depth += 1
+
+    def on_finish(self, outcome):
+        with self._lock:
+            self.depth -= 1
+            self.retried += outcome['attempts'] - 1
+            if outcome['ok']:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            self._wait.append(outcome['wait'])
+            self._run.append(outcome['run'])
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'depth': self.depth,
+                'enqueued': self.enqueued,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'retried': self.retried,
+                **_latency('wait', list(self._wait)),
+                **_latency('run', list(self._run)),
+            }
+
+
+def _latency(prefix, samples):
+    if not samples:
+        return {f'{prefix}_p50': 0.0, f'{prefix}_max': 0.0}
+    return {
+        f'{prefix}_p50': statistics.median(samples),
+        f'{prefix}_max': max(samples),
+    }
+
+
+metrics = TaskMetrics()
+
+
+def _max_retries(name):
+    return getattr(
+        import_string(name), 'max_retries', get_config()['MAX_RETRIES']
+    )
+
+
+def _retry_delay(attempts):
+    return get_config()['RETRY_DELAY'] * 2 ** (attempts - 1)
+
+
+def _attempt(name, args, kwargs, attempt):
+    """Одна попытка задачи в текущем потоке или процессе."""
+    started = time.time()
+    ok = False
+    try:
+        import_string(name)(*args, **kwargs)
+        ok = True
+    except Exception:
+        logger.exception('Задача %s: попытка %s не удалась', name, attempt)
+    return {'ok': ok, 'started': started, 'run': time.time() - started}
+
+
+def _attempt_in_worker(name, args, kwargs, attempt):
+    try:
+        return _attempt(name, args, kwargs, attempt)
+    finally:
+        close_old_connections()
+
+
+class SyncBackend:
+    """Выполняет задачу сразу, в потоке запроса. Для тестов и отладки."""
+
+    def enqueue(self, name, args, kwargs):
+        metrics.on_enqueue()
+        enqueued_at = time.time()
+        max_retries = _max_retries(name)
+        attempts = 0
+        while True:
+            attempts += 1
+            result = _attempt(name, args, kwargs, attempts)
+            if result['ok'] or attempts > max_retries:
+                break
+            time.sleep(_retry_delay(attempts))
+        metrics.on_finish({
+            'ok': result['ok'],
+            'attempts': attempts,
+            'wait': 0.0,
+            'run': time.time() - enqueued_at,
+        })
+
+    def stats(self):
+        return metrics.snapshot()
+
+
+class PoolBackend:
+    """Выполняет задачи в пуле; повтор ждёт в таймере, а не в воркере."""
+
+    executor_class = None
+
+    def __init__(self, workers):
+        self._workers = workers
+        self._executor = None
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.create_executor(self._workers)
+            return self._executor
+
+    def create_executor(self, workers):
+        return self.executor_class(max_workers=workers)
+
+    def enqueue(self, name, args, kwargs):
+        # Задача уходит в пул после коммита: иначе она может не увидеть
+        # ещё не зафиксированные изменения запроса.
+        transaction.on_commit(lambda: self._submit(name, args, kwargs))
+
+    def _submit(self, name, args, kwargs):
+        metrics.on_enqueue()
+        self._schedule({
+            'name': name,
+            'args': args,
+            'kwargs': kwargs,
+            'max_retries': _max_retries(name),
+            'enqueued_at': time.time(),
+            'attempts': 0,
+            'wait': None,
+            'run': 0.0,
+        })
+
+    def _schedule(self, job):
+        with self._lock:
+            self._timers.pop(id(job), None)
+        job['attempts'] += 1
+        future = self._get_executor().submit(
+            _attempt_in_worker,
+            job['name'], job['args'], job['kwargs'], job['attempts'],
+        )
+        future.add_done_callback(partial(self._done, job))
+
+    def _retry_later(self, job):
+        timer = threading.Timer(
+            _retry_delay(job['attempts']), self._schedule, (job,)
+        )
+        timer.daemon = True
+        with self._lock:
+            self._timers[id(job)] = (timer, job)
+        timer.start()
+
+    def _done(self, job, future):
+        try:
+            result = future.result()
+        except Exception:
+            logger.exception('Пул задач не вернул результат')
+            result = {'ok': False, 'started': time.time(), 'run': 0.0}
+            job['max_retries'] = 0
+        if job['wait'] is None:
+            job['wait'] = result['started'] - job['enqueued_at']
+        job['run'] += result['run']
+        if not result['ok'] and job['attempts'] <= job['max_retries']:
+            self._retry_later(job)
+        else:
+            self._finish(job, result['ok'])
+
+    @staticmethod
+    def _finish(job, ok):
+        metrics.on_finish({
+            'ok': ok,
+            'attempts': job['attempts'],
+            'wait': job['wait'] or 0.0,
+            'run': job['run'],
+        })
+
+    def stats(self):
+        return metrics.snapshot()
+
+    def shutdown(self):
+        with self._lock:
+            timers, self._timers = self._timers, {}
+        for timer, job in timers.values():
+            # Отложенный повтор не переживёт остановку процесса.
+            timer.cancel()
+            logger.warning('Повтор задачи %s отменён', job['name'])
+            self._finish(job, False)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+class ThreadBackend(PoolBackend):
+    executor_class = ThreadPoolExecutor
+
+
+class ProcessBackend(PoolBackend):
+
+    def create_executor(self, workers):
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        )
+
+
+class DatabaseBackend:
+    """Надёжная очередь в таблице blog_task; задачи выполняет run_tasks."""
+
+    def enqueue(self, name, args, kwargs):
+        Task.objects.create(
+            name=name, payload=json.dumps({'args': args, 'kwargs': kwargs})
+        )
+
+    def claim(self):
+        now = timezone.now()
+        # Задачу в статусе RUNNING дольше LEASE секунд считаем брошенной
+        # упавшим воркером и возвращаем в работу.
+        expired = now - timedelta(seconds=get_config()['LEASE'])
+        for task in Task.objects.filter(
+            Q(status=Task.Status.QUEUED, run_after__lte=now)
+            | Q(status=Task.Status.RUNNING, started_at__lt=expired)
+        ).order_by('run_after', 'id')[:10]:
+            # Условный UPDATE не даст двум воркерам взять одну задачу.
+            claimed = Task.objects.filter(
+                pk=task.pk, status=task.status, started_at=task.started_at
+            ).update(
+                status=Task.Status.RUNNING,
+                started_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                task.refresh_from_db()
+                return task
+        return None
+
+    def run(self, task):
+        func = import_string(task.name)
+        payload = json.loads(task.payload)
+        max_retries = _max_retries(task.name)
+        try:
+            if task.attempts > max_retries + 1:
+                # Попытки исчерпаны воркерами, не дожившими до конца.
+                raise TimeoutError('Истёк срок аренды задачи')
+            func(*payload['args'], **payload['kwargs'])
+        except Exception as error:
+            logger.exception('Задача %s (#%s) не удалась', task.name, task.pk)
+            task.last_error = f'{type(error).__name__}: {error}'
+            if task.attempts > max_retries:
+                task.status = Task.Status.FAILED
+            else:
+                task.status = Task.Status.QUEUED
+                task.run_after = timezone.now() + timedelta(
+                    seconds=_retry_delay(task.attempts)
+                )
+        else:
+            task.status = Task.Status.DONE
+        task.finished_at = timezone.now()
+        task.save(update_fields=(
+            'status', 'run_after', 'finished_at', 'last_error'
+        ))
+        return task.status == Task.Status.DONE
+
+    def stats(self):
+        counts = dict(
+            Task.objects.values_list('status').annotate(
+                total=Count('id')
+            ).order_by()
+        )
+        finished = list(Task.objects.filter(
+            status=Task.Status.DONE
+        ).order_by('-finished_at').values_list(
+            'created_at', 'started_at', 'finished_at'
+        )[:1000])
+        return {
+            'depth': counts.get(Task.Status.QUEUED, 0),
+            'running': counts.get(Task.Status.RUNNING, 0),
+            'succeeded': counts.get(Task.Status.DONE, 0),
+            'failed': counts.get(Task.Status.FAILED, 0),
+            **_latency('wait', [
+                (started - created).total_seconds()
+                for created, started, _ in finished
+            ]),
+            **_latency('run', [
+                (done - started).total_seconds()
+                for _, started, done in finished
+            ]),
+        }
+
+
+BACKENDS = {
+    'sync': SyncBackend,
+    'thread': ThreadBackend,
+    'process': ProcessBackend,
+    'database': DatabaseBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        config = get_config()
+        backend_class = BACKENDS[config['BACKEND']]
+        if issubclass(backend_class, PoolBackend):
+            _backend = backend_class(config['WORKERS'])
+        else:
+            _backend = backend_class()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'BLOG_TASKS':
+        if isinstance(_backend, PoolBackend):
+            _backend.shutdown()
+        _backend = None
+
+
+def task(max_retries=None):
+    """Регистрирует функцию как фоновую задачу: `func.delay(...)`.
+
+    Аргументы задачи должны сериализоваться в JSON, чтобы её
+    можно было сохранить в таблицу для бэкенда 'database'.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            get_backend().enqueue(name, list(args), kwargs)
+
+        func.delay = delay
+        if max_retries is not None:
+            func.max_retries = max_retries
+        return func
+    return decorator
+
+
+@task()
+def process_post_image(post_id):
+    """Убирает EXIF из оригинала и строит уменьшенные копии."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    name = strip_exif(post.image.name)
+    update_fields = ['image_width', 'updated_at']
+    if name != post.image.name:
+        post.image.name = name
+        update_fields.append('image')
+    post.image_width = build_derivatives(name)
+    post.save(update_fields=update_fields)
+
+
+@task()
+def index_post(post_id):
+    search.index_post(post_id)
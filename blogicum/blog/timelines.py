@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from .constants import TIMELINE_ORDERING
+from .models import Post, TimelineEntry, card_excerpt
+from .utils import get_page
+
+
+def post_feeds(post):
+    """Материализованные ленты, в которые попадает пост."""
+    feeds = [f'author:{post.author_id}']
+    if post.category_id:
+        feeds.append(f'category:{post.category_id}')
+    return feeds
+
+
+def build_entries(posts):
+    """Записи лент для постов с загруженными категорией и автором."""
+    entries = []
+    for post in posts:
+        category = post.category
+        fields = {
+            'post_id': post.pk,
+            'pub_date': post.pub_date,
+            'title': post.title,
+            'excerpt': card_excerpt(post.text),
+            'image': post.image.name or '',
+            'image_width': post.image_width,
+            'is_published': post.is_published,
+            'is_visible': post.is_visible,
+            'comment_count': post.comment_count,
+            'author_id': post.author_id,
+            'author_username': post.author.username,
+            'category_id': post.category_id,
+            'category_slug': category.slug if category else '',
+            'category_title': category.title if category else '',
+            'category_is_published': bool(category and category.is_published),
+            'location_id': post.location_id,
+            'location_label': post.location_label,
+        }
+        entries.extend(
+            TimelineEntry(feed=feed, **fields) for feed in post_feeds(post)
+        )
+    return entries
+
+
+def card_posts():
+    return Post.objects.select_related('category', 'author')
+
+
+def refresh_post(post_id):
+    """Перезаписывает записи лент одного поста."""
+    with transaction.atomic():
+        TimelineEntry.objects.filter(post_id=post_id).delete()
+        TimelineEntry.objects.bulk_create(
+            build_entries(card_posts().filter(pk=post_id))
+        )
+
+
+def sync_post_fields(fields, post_ids=None):
+    """Копирует поля постов в их записи лент одним UPDATE.
+
+    Для массовых изменений постов в обход сигналов: bulk_update,
+    пересчёта счётчиков комментариев.
+    """
+    entries = TimelineEntry.objects.all()
+    if post_ids is not None:
+        entries = entries.filter(post_id__in=post_ids)
+    return entries.update(**{
+        field: Subquery(
+            Post.objects.filter(pk=OuterRef('post_id')).values(field)[:1]
+        )
+        for field in fields
+    })
+
+
+def timeline(feed, public=True):
+    entries = TimelineEntry.objects.filter(feed=feed)
+    if public:
+        entries = entries.filter(is_visible=True)
+    return entries.order_by(*TIMELINE_ORDERING)
+
+
+def timeline_page(request, feed, scopes, public=True):
+    """Страница материализованной ленты; в ней — экземпляры Post."""
+    page = get_page(request, timeline(feed, public), scopes, public,
+                    ordering=TIMELINE_ORDERING)
+    page.object_list = [entry.as_post() for entry in page.object_list]
+    return page
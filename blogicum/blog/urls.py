@@ -6,12 +6,15 @@ app_name = 'blog'
 urlpatterns = [
     path('', views.PostListView.as_view(), name='index'),
     path('posts/<int:pk>/', views.post_detail, name='post_detail'),
+    path('posts/<int:pk>/comments/', views.post_comments,
+         name='post_comments'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:pk>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:pk>/delete/', views.PostDeleteView.as_view(),
          name='delete_post'),
     path('category/<slug:category_slug>/', views.category_posts,
          name='category_posts'),
+    path('search/', views.search, name='search'),
     path('profile/<slug:username>/', views.profile, name='profile'),
     path('edit_profile/', views.edit_profile, name='edit_profile'),
     path('posts/<int:post_id>/comment/', views.add_comment,
@@ -20,4 +23,11 @@ urlpatterns = [
          views.CommentUpdateView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(), name='delete_comment'),
+    path('feed_cache/stats/', views.feed_cache_stats_view,
+         name='feed_cache_stats'),
+    path('tasks/stats/', views.task_stats_view, name='task_stats'),
+    path('profiling/', views.profiling_view, name='profiling'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('health/', views.health_view, name='health'),
+    path('export/<slug:model_name>/', views.export_view, name='export'),
 ]
@@ -1,16 +1,27 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.db.models import Count
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.urls import reverse
-from .constants import FILTERS_FOR_PUBLIC
-from .models import Comment
+from .constants import (
+    COMMENTS_ORDERING,
+    COMMENTS_PER_PAGE,
+    NUMBER_OF_POSTS,
+    POSTS_ORDERING,
+)
+from .models import Comment, Post
 from .forms import CommentForm
+from .paginators import CursorPaginator, FeedPaginator
+from .serialization import EXPORT_FORMATS, iter_export
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
 
     def test_func(self):
         object = self.get_object()
-        return object.author == self.request.user
+        return object.author_id == self.request.user.id
 
 
 class CommentMixin(OnlyAuthorMixin):
@@ -24,16 +35,93 @@ class CommentMixin(OnlyAuthorMixin):
                        kwargs={'pk': self.kwargs['post_id']})
 
 
-def search_params(posts, profile=None, filters=None):
+def search_params(posts, profile=None, public=True):
     stage_1 = posts.select_related(
         'category',
-        'location',
         'author'
     )
+    if public:
+        stage_1 = stage_1.published()
     if profile:
-        stage_2 = stage_1.filter(author_id=profile, **filters)
+        stage_1 = stage_1.filter(author_id=profile)
+    return stage_1.order_by(*POSTS_ORDERING)
+
+
+def get_page(request, posts, scopes=None, public=True,
+             ordering=POSTS_ORDERING):
+    """Страница ленты: `?page=N` или курсор `?cursor=...`.
+
+    Курсорный режим включается настройкой `BLOG_PAGINATION_MODE`
+    или наличием параметра `cursor` в запросе. С областями кеша
+    ленты `scopes` число постов берётся из кеша или оценивается.
+    """
+    mode = getattr(settings, 'BLOG_PAGINATION_MODE', 'page')
+    if mode == 'cursor' or 'cursor' in request.GET:
+        paginator = CursorPaginator(posts, NUMBER_OF_POSTS, ordering)
+        return paginator.get_page(request.GET.get('cursor'))
+    if scopes:
+        paginator = FeedPaginator(posts, NUMBER_OF_POSTS, scopes, public)
     else:
-        stage_2 = stage_1.filter(**FILTERS_FOR_PUBLIC)
-    return stage_2.annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date', 'title')
+        paginator = Paginator(posts, NUMBER_OF_POSTS)
+    page = paginator.get_page(request.GET.get('page'))
+    page.elided_page_range = list(
+        paginator.get_elided_page_range(page.number)
+    )
+    return page
+
+
+def get_comments_page(post, cursor=None):
+    """Очередная порция комментариев поста в порядке добавления."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post=post).select_related('author'),
+        COMMENTS_PER_PAGE,
+        COMMENTS_ORDERING,
+    )
+    return paginator.get_page(cursor)
+
+
+def _post_stamp(request, pk):
+    if not hasattr(request, '_post_stamp'):
+        # Без ORDER BY: строка одна, а сортировка по id после LEFT JOIN
+        # SQLite выполняет во временном B-дереве.
+        stamps = Post.objects.visible_to(
+            request.user
+        ).filter(pk=pk).values_list(
+            'updated_at',
+            'category__updated_at',
+            'location__updated_at',
+            'comment_count',
+            'author__username',
+        ).order_by()[:1]
+        request._post_stamp = next(iter(stamps), None)
+    return request._post_stamp
+
+
+def post_detail_etag(request, pk):
+    stamp = _post_stamp(request, pk)
+    if stamp is None:
+        return None
+    raw = '|'.join(map(str, (
+        *stamp, request.user.pk, request.get_full_path()
+    )))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def post_detail_last_modified(request, pk):
+    stamp = _post_stamp(request, pk)
+    if stamp is None:
+        return None
+    return max(moment for moment in stamp[:3] if moment)
+
+
+def export_response(querysets, export_format, compress=False):
+    """Выгрузка моделей файлом, который отдаётся по мере чтения из базы."""
+    content_type, extension = EXPORT_FORMATS[export_format]
+    name = '-'.join(queryset.model._meta.model_name for queryset in querysets)
+    filename = f'{name}.{extension}' + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        iter_export(querysets, export_format, compress),
+        content_type='application/gzip' if compress else content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,21 +1,58 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from .models import Post, Category, User, Comment
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .cache import (
+    cache_feed_page,
+    feed_cache_stats,
+    feed_etag,
+    feed_scopes,
+)
+from .db import health
+from .tasks import get_backend, process_post_image
+from .profiling import get_buffer, get_config, prometheus_metrics
+from .models import Post, Category, User
+from .scheduling import publishes_due
+from .search import search_page
+from .timelines import timeline_page
+from .serialization import EXPORT_FORMATS, EXPORT_MODELS
 from .forms import PostForm, UserForm, CommentForm
-from .utils import OnlyAuthorMixin, CommentMixin, search_params
-from .constants import NUMBER_OF_POSTS, FILTERS_FOR_PUBLIC
+from .utils import (
+    OnlyAuthorMixin,
+    CommentMixin,
+    export_response,
+    get_comments_page,
+    get_page,
+    post_detail_etag,
+    post_detail_last_modified,
+    search_params,
+)
+from .constants import NUMBER_OF_POSTS
 
 
+@method_decorator(publishes_due, name='dispatch')
+@method_decorator(condition(etag_func=feed_etag('index')), name='dispatch')
+@method_decorator(cache_feed_page('index'), name='dispatch')
 class PostListView(ListView):
     model = Post
     template_name = 'blog/index.html'
-    queryset = search_params(Post.objects)
     paginate_by = NUMBER_OF_POSTS
 
+    def get_queryset(self):
+        return search_params(Post.objects)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = get_page(self.request, queryset, feed_scopes('index'))
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
 
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
@@ -24,13 +61,16 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if self.object.image:
+            process_post_image.delay(self.object.pk)
+        return response
 
 
 def edit_post(request, pk):
     template = 'blog/create.html'
     instance = get_object_or_404(Post, pk=pk)
-    if request.user != instance.author:
+    if request.user.id != instance.author_id:
         return redirect('blog:post_detail', pk=pk)
     form = PostForm(
         request.POST or None,
@@ -39,26 +79,64 @@ def edit_post(request, pk):
     )
     context = {'form': form}
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            instance.image_width = None
         instance.save()
+        if image_changed and instance.image:
+            process_post_image.delay(instance.pk)
         return redirect('blog:post_detail', pk=pk)
     return render(request, template, context)
 
 
+@publishes_due
+@condition(
+    etag_func=post_detail_etag,
+    last_modified_func=post_detail_last_modified,
+)
 def post_detail(request, pk):
     template = 'blog/detail.html'
-    instance = get_object_or_404(Post, pk=pk)
-    filters = {}
-    if request.user != instance.author:
-        filters = FILTERS_FOR_PUBLIC
-    post = get_object_or_404(Post.objects.select_related(
-        'category',
-        'location',
-        'author'
-    ), pk=pk, **filters)
+    post = get_object_or_404(
+        Post.objects.visible_to(request.user).select_related(
+            'category',
+            'author'
+        ),
+        pk=pk
+    )
     form = CommentForm()
-    comments = Comment.objects.filter(
-        post_id=pk).select_related('author').order_by('created_at')
-    context = {'form': form, 'post': post, 'comments': comments}
+    context = {
+        'form': form,
+        'post': post,
+        'comments': get_comments_page(post),
+    }
+    return render(request, template, context)
+
+
+@publishes_due
+def post_comments(request, pk):
+    template = 'includes/comment_list.html'
+    post = get_object_or_404(
+        Post.objects.visible_to(request.user).only('id'), pk=pk
+    )
+    context = {
+        'post': post,
+        'comments': get_comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, template, context)
+
+
+@publishes_due
+def search(request):
+    template = 'blog/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = search_page(query, request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
     return render(request, template, context)
 
 
@@ -69,10 +147,13 @@ class PostDeleteView(OnlyAuthorMixin, DeleteView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = PostForm(instance=self.get_object())
+        context['form'] = PostForm(instance=self.object)
         return context
 
 
+@publishes_due
+@condition(etag_func=feed_etag('category', 'category_slug'))
+@cache_feed_page('category', 'category_slug')
 def category_posts(request, category_slug):
     template = 'blog/category.html'
     category = get_object_or_404(
@@ -80,26 +161,24 @@ def category_posts(request, category_slug):
         slug=category_slug,
         is_published=True
     )
-    post_list = search_params(Post.objects).filter(
-        category=category
+    page_obj = timeline_page(
+        request, f'category:{category.pk}',
+        feed_scopes('category', category_slug),
     )
-    paginator = Paginator(post_list, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     context = {'page_obj': page_obj, 'category': category}
     return render(request, template, context)
 
 
+@publishes_due
+@condition(etag_func=feed_etag('profile', 'username'))
+@cache_feed_page('profile', 'username')
 def profile(request, username):
     template = 'blog/profile.html'
     profile = get_object_or_404(User, username=username)
-    filters = {}
-    if request.user != profile:
-        filters = FILTERS_FOR_PUBLIC
-    posts = search_params(Post.objects, profile.id, filters)
-    paginator = Paginator(posts, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = timeline_page(
+        request, f'author:{profile.pk}', feed_scopes('profile', username),
+        public=request.user != profile,
+    )
     context = {
         'profile': profile,
         'page_obj': page_obj
@@ -126,7 +205,8 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', pk=post_id)
 
 
@@ -135,4 +215,70 @@ class CommentUpdateView(CommentMixin, UpdateView):
 
 
 class CommentDeleteView(CommentMixin, DeleteView):
-    pass
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
+
+@staff_member_required
+def feed_cache_stats_view(request):
+    return JsonResponse(feed_cache_stats())
+
+
+@staff_member_required
+def task_stats_view(request):
+    return JsonResponse(get_backend().stats())
+
+
+def health_view(request):
+    report = health()
+    return JsonResponse(report, status=200 if report['ok'] else 503)
+
+
+@staff_member_required
+def profiling_view(request):
+    return render(request, 'blog/profiling.html', {
+        'records': get_buffer().records(),
+        'totals': get_buffer().totals(),
+        'sample_rate': get_config()['SAMPLE_RATE'],
+    })
+
+
+def _metrics(request):
+    cache_stats = feed_cache_stats()
+    task_stats = get_backend().stats()
+    return HttpResponse(
+        prometheus_metrics((
+            ('blog_feed_cache_hits_total', 'counter', cache_stats['hits']),
+            ('blog_feed_cache_misses_total', 'counter',
+             cache_stats['misses']),
+            ('blog_tasks_depth', 'gauge', task_stats['depth']),
+            ('blog_tasks_succeeded_total', 'counter',
+             task_stats['succeeded']),
+            ('blog_tasks_failed_total', 'counter', task_stats['failed']),
+        )),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def metrics_view(request):
+    """Метрики для Prometheus: сотрудникам или по токену из настроек."""
+    token = get_config()['METRICS_TOKEN']
+    if token and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return _metrics(request)
+    return staff_member_required(_metrics)(request)
+
+
+@staff_member_required
+def export_view(request, model_name):
+    export_format = request.GET.get('format', 'jsonl')
+    if model_name not in EXPORT_MODELS or export_format not in EXPORT_FORMATS:
+        raise Http404
+    return export_response(
+        [EXPORT_MODELS[model_name].objects.all()],
+        export_format,
+        compress='gzip' in request.GET,
+    )
@@ -0,0 +1,87 @@
+import time
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .cache import invalidate
+from .constants import FILTERS_FOR_PUBLIC
+from .models import FeedCounter, Location, Post, TimelineEntry
+from .scheduling import reschedule
+from .timelines import sync_post_fields
+
+
+def refresh_category(category, is_published=None):
+    """Пересчитывает видимость постов категории после смены is_published.
+
+    Одно UPDATE по category_id для постов и одно для их записей лент,
+    счётчики лент сдвигаются по числу постов каждого автора.
+    is_published=False скрывает посты удаляемой категории.
+    Возвращает число изменённых постов, записей и время в секундах.
+    """
+    started = time.perf_counter()
+    now = timezone.now()
+    if is_published is None:
+        is_published = category.is_published
+    if is_published:
+        changed = {'is_visible': False, 'is_published': True,
+                   'pub_date__lte': now}
+    else:
+        changed = {'is_visible': True}
+    with transaction.atomic():
+        changed_posts = Post.objects.filter(category=category, **changed)
+        FeedCounter.objects.shift_posts(
+            changed_posts, 1 if is_published else -1
+        )
+        posts = changed_posts.update(is_visible=is_published)
+        entries = TimelineEntry.objects.filter(
+            category=category, **changed
+        ).update(is_visible=is_published)
+    reschedule()
+    return posts, entries, time.perf_counter() - started
+
+
+def refresh_location(location, is_published=None):
+    """Обновляет место в карточках после смены названия или is_published.
+
+    is_published=False убирает место удаляемой локации из карточек.
+    Возвращает то же, что refresh_category.
+    """
+    started = time.perf_counter()
+    if is_published is None:
+        is_published = location.is_published
+    label = location.name if is_published else ''
+    with transaction.atomic():
+        posts = Post.objects.filter(location=location).exclude(
+            location_label=label
+        ).update(location_label=label)
+        entries = TimelineEntry.objects.filter(location=location).exclude(
+            location_label=label
+        ).update(location_label=label)
+    return posts, entries, time.perf_counter() - started
+
+
+def recompute_visibility(now=None):
+    """Пересчитывает is_visible и location_label всех постов и их лент.
+
+    Для данных, загруженных в обход сигналов. Возвращает число
+    скрытых и открытых постов.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        hidden = Post.objects.filter(is_visible=True).exclude(
+            pub_date__lte=now, **FILTERS_FOR_PUBLIC
+        ).update(is_visible=False)
+        shown = Post.objects.due(now).update(is_visible=True)
+        Post.objects.exclude(location__is_published=True).exclude(
+            location_label=''
+        ).update(location_label='')
+        Post.objects.filter(location__is_published=True).update(
+            location_label=Subquery(Location.objects.filter(
+                pk=OuterRef('location_id')
+            ).values('name')[:1])
+        )
+        sync_post_fields(('is_visible', 'location_label'))
+    invalidate('all')
+    reschedule()
+    return hidden, shown
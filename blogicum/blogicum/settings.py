@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.profiling.ProfilingMiddleware',
+    'blog.nplusone.NPlusOneMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -97,6 +99,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Для нескольких процессов на одной машине подойдёт
+# 'django.core.cache.backends.filebased.FileBasedCache' с LOCATION.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -146,7 +161,10 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма уходят в фоновую очередь, доставляет их BLOG_EMAIL_DELIVERY_BACKEND
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+
+BLOG_EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -159,3 +177,40 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 MEDIA_URL = 'media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Режим пагинации лент: 'page' (?page=N) или 'cursor' (keyset, без COUNT)
+BLOG_PAGINATION_MODE = 'page'
+
+# Кеш готовых страниц лент для анонимных посетителей
+BLOG_FEED_CACHE = 'default'
+BLOG_FEED_CACHE_TIMEOUT = 300
+
+# Фоновые задачи (изображения, почта). BACKEND: 'sync', 'thread', 'process'
+# или 'database' — очередь в таблице, её выполняет `manage.py run_tasks`.
+# Повторная попытка ждёт RETRY_DELAY * 2 ** (номер попытки - 1) секунд.
+# Задачу из таблицы, которая выполняется дольше LEASE секунд, забирает
+# другой воркер: прежний, скорее всего, упал.
+BLOG_TASKS = {
+    'BACKEND': 'thread',
+    'WORKERS': 2,
+    'MAX_RETRIES': 3,
+    'RETRY_DELAY': 5,
+    'LEASE': 300,
+}
+
+# Замер доли запросов (SAMPLE_RATE) в кольцевой буфер на BUFFER_SIZE
+# записей: страница /profiling/ и метрики Prometheus на /metrics/.
+# Без входа метрики отдаются по заголовку «Authorization: Bearer <токен>».
+BLOG_PROFILING = {
+    'SAMPLE_RATE': 0.01,
+    'BUFFER_SIZE': 1000,
+    'METRICS_TOKEN': '',
+}
+
+# Поиск N+1: запросы одной формы, выполненные за запрос больше THRESHOLD
+# раз, попадают в журнал blog.nplusone; с RAISE — исключение (только
+# в тестах, см. tests/conftest.py). Работает лишь при разработке.
+BLOG_NPLUSONE = {
+    'ENABLED': DEBUG,
+    'THRESHOLD': 5,
+}
@@ -0,0 +1,100 @@
+"""Настройки для продакшена.
+
+DJANGO_SETTINGS_MODULE=blogicum.settings_production. Значения
+берутся из переменных окружения, база по умолчанию — SQLite в режиме
+WAL; с BLOG_DB_ENGINE=postgresql — PostgreSQL с репликами для чтения.
+Локально реплику заменяет копия файла SQLite (SQLITE_REPLICA_PATH),
+которую обновляет команда sync_sqlite_replica.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, INSTALLED_APPS, MIDDLEWARE, SECRET_KEY
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+if os.environ.get('DJANGO_ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.environ['DJANGO_ALLOWED_HOSTS'].split(',')
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'debug_toolbar']
+
+# Поиск N+1 нужен при разработке и в тестах
+BLOG_NPLUSONE = {'ENABLED': False}
+
+# Чтение GET-запросов уходит на реплики, если они заданы. Привязка
+# к основной базе хранится в сессии, поэтому после SessionMiddleware.
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if not middleware.startswith(('debug_toolbar.', 'blog.nplusone.'))
+]
+MIDDLEWARE.insert(
+    MIDDLEWARE.index(
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+    ) + 1,
+    'blog.db.ReplicaReadsMiddleware',
+)
+
+# Постоянные соединения; разорванные закрываются в начале запроса
+CONN_MAX_AGE = int(os.environ.get('DJANGO_CONN_MAX_AGE', 60))
+BLOG_CONN_HEALTH_CHECKS = True
+
+if os.environ.get('BLOG_DB_ENGINE') == 'postgresql':
+    def _postgres(host):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'blogicum'),
+            'USER': os.environ.get('POSTGRES_USER', 'blogicum'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': host,
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
+
+    DATABASES = {'default': _postgres(
+        os.environ.get('POSTGRES_HOST', 'localhost')
+    )}
+    # POSTGRES_REPLICA_HOSTS — хосты реплик через запятую
+    for number, host in enumerate(filter(None, os.environ.get(
+        'POSTGRES_REPLICA_HOSTS', ''
+    ).split(',')), start=1):
+        DATABASES[f'replica{number}'] = {
+            **_postgres(host), 'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            # Секунды ожидания блокировки модулем sqlite3
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+
+    if os.environ.get('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.environ['SQLITE_REPLICA_PATH'],
+            'TEST': {'MIRROR': 'default'},
+        }
+
+    # Применяются к каждому соединению (blog.db.configure_sqlite)
+    BLOG_SQLITE_PRAGMAS = {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 20000,
+        'mmap_size': 268435456,
+        'cache_size': -20000,
+        'temp_store': 'memory',
+    }
+
+BLOG_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Сессия читает основную базу столько секунд после своей записи
+BLOG_REPLICA_PIN_SECONDS = int(os.environ.get('BLOG_REPLICA_PIN_SECONDS', 10))
+
+DATABASE_ROUTERS = ['blog.db.PrimaryReplicaRouter']
@@ -2,12 +2,16 @@ from django.db import models
 
 
 class PublishedModel(models.Model):
-    """Абстрактная модель. Добвляет флаг is_published и дату создания."""
+    """Абстрактная модель. Добвляет флаг is_published и даты изменений."""
 
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
     is_published = models.BooleanField(
         default=True,
         verbose_name='Опубликовано',
@@ -41,6 +41,44 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def sync_tasks():
+    with override_settings(BLOG_TASKS={'BACKEND': 'sync', 'RETRY_DELAY': 0}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def raise_on_nplusone():
+    """Повторяющиеся запросы (N+1) в обработчике роняют тест."""
+    with override_settings(BLOG_NPLUSONE={"THRESHOLD": 5, "RAISE": True}):
+        yield
+
+
+@pytest.fixture
+def assert_no_nplusone():
+    """Контекст, который проверяет на N+1 код вне HTTP-запросов."""
+    from contextlib import contextmanager
+
+    from blog.nplusone import report, track_queries
+
+    @contextmanager
+    def check(threshold=5):
+        with track_queries() as shapes:
+            yield shapes
+        report(shapes.repeated(threshold), "блок теста", raise_error=True)
+
+    return check
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +401,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
@@ -0,0 +1,215 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+pytestmark = [pytest.mark.django_db]
+
+# Строк на странице списка больше порога поиска N+1 (см. conftest.py):
+# запрос на строку уронит тест.
+N_ROWS = 12
+
+
+@pytest.fixture
+def admin_data(mixer, published_category, published_location, user):
+    posts = mixer.cycle(N_ROWS).blend(
+        "blog.Post", category=published_category,
+        location=published_location, author=user, text="Слово " * 100,
+    )
+    for post in posts:
+        mixer.blend("blog.Comment", post=post, author=user)
+    return posts
+
+
+@pytest.mark.parametrize(
+    "url_name",
+    ["admin:blog_post_changelist", "admin:blog_comment_changelist"],
+)
+def test_changelist_without_nplusone(admin_client, admin_data, url_name):
+    response = admin_client.get(reverse(url_name))
+    assert response.status_code == 200
+    assert "Слово " * 20 not in response.content.decode(), (
+        "Текст в списке админки должен быть сокращён."
+    )
+
+
+@pytest.mark.parametrize("model", ["category", "location"])
+def test_inline_posts_capped(
+    admin_client, admin_data, published_category, published_location, model
+):
+    from blog.constants import ADMIN_INLINE_POSTS
+
+    obj = published_category if model == "category" else published_location
+    response = admin_client.get(
+        reverse(f"admin:blog_{model}_change", args=(obj.pk,))
+    )
+    assert response.status_code == 200
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == ADMIN_INLINE_POSTS
+
+
+def test_post_search_uses_index(admin_client, admin_data):
+    from blog.search import index_post
+
+    post = admin_data[0]
+    post.title = "Уникальнейший заголовок"
+    post.save()
+    index_post(post.pk)
+    response = admin_client.get(
+        reverse("admin:blog_post_changelist"), {"q": "уникальнейший"}
+    )
+    assert list(response.context["cl"].result_list) == [post]
+    response = admin_client.get(
+        reverse("admin:blog_post_changelist"), {"q": str(post.pk)}
+    )
+    assert list(response.context["cl"].result_list) == [post]
+
+
+def test_approximate_count_from_statistics(admin_client, admin_data):
+    from django.db import connection
+
+    from blog.models import Post
+    from blog.paginators import ApproximateCountPaginator, approximate_count
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+        cursor.execute(
+            "UPDATE sqlite_stat1 SET stat = '2000000 1' WHERE tbl = %s",
+            [Post._meta.db_table],
+        )
+    assert approximate_count(Post) == 2000000
+    paginator = ApproximateCountPaginator(Post.objects.all(), 100)
+    assert paginator.count == 2000000
+    paginator = ApproximateCountPaginator(
+        Post.objects.filter(is_published=True), 100
+    )
+    assert paginator.count == Post.objects.filter(is_published=True).count()
+
+
+def _change_form_data(admin_client, url, fields, fk_name, obj):
+    response = admin_client.get(url)
+    formset = response.context["inline_admin_formsets"][0].formset
+    data = {
+        **fields,
+        **{
+            f"{formset.prefix}-{key}": value
+            for key, value in formset.management_form.initial.items()
+        },
+    }
+    for index, form in enumerate(formset.forms):
+        data[f"{formset.prefix}-{index}-id"] = form.instance.pk
+        data[f"{formset.prefix}-{index}-{fk_name}"] = obj.pk
+    return data
+
+
+def test_category_saves_with_capped_inline(
+    admin_client, admin_data, published_category
+):
+    url = reverse("admin:blog_category_change", args=(published_category.pk,))
+    data = _change_form_data(admin_client, url, {
+        "title": "Новое название",
+        "description": published_category.description,
+        "slug": published_category.slug,
+        "is_published": "on",
+    }, "category", published_category)
+    response = admin_client.post(url, data)
+    assert response.status_code == 302
+    published_category.refresh_from_db()
+    assert published_category.title == "Новое название"
+
+
+def test_category_unpublish_cascade_reported(
+    admin_client, admin_data, published_category
+):
+    from blog.models import Post, TimelineEntry
+
+    url = reverse("admin:blog_category_change", args=(published_category.pk,))
+    data = _change_form_data(admin_client, url, {
+        "title": published_category.title,
+        "description": published_category.description,
+        "slug": published_category.slug,
+    }, "category", published_category)
+    response = admin_client.post(url, data, follow=True)
+    messages = [str(message) for message in response.context["messages"]]
+    assert any(
+        f"обновлено постов — {N_ROWS}, записей лент — {2 * N_ROWS}" in text
+        for text in messages
+    ), "Админка должна сообщать, сколько строк обновил каскад видимости."
+    assert not Post.objects.filter(is_visible=True).exists()
+    assert not TimelineEntry.objects.filter(is_visible=True).exists()
+
+
+def test_location_unpublish_clears_labels(
+    admin_client, admin_data, published_location
+):
+    from blog.models import Post
+
+    assert Post.objects.filter(location_label=published_location.name).count(
+    ) == N_ROWS
+    url = reverse("admin:blog_location_change", args=(published_location.pk,))
+    data = _change_form_data(
+        admin_client, url, {"name": published_location.name},
+        "location", published_location,
+    )
+    response = admin_client.post(url, data, follow=True)
+    assert any(
+        f"обновлено постов — {N_ROWS}" in str(message)
+        for message in response.context["messages"]
+    )
+    assert not Post.objects.exclude(location_label="").exists(), (
+        "Снятое с публикации место не должно выводиться в карточках."
+    )
+
+
+def test_location_delete_clears_labels(
+    admin_client, admin_data, published_location
+):
+    from blog.models import Post, TimelineEntry
+
+    url = reverse("admin:blog_location_delete", args=(published_location.pk,))
+    response = admin_client.post(url, {"post": "yes"}, follow=True)
+    assert any(
+        f"обновлено постов — {N_ROWS}" in str(message)
+        for message in response.context["messages"]
+    ), "Админка должна сообщать о каскаде при удалении местоположения."
+    assert not Post.objects.exclude(location_label="").exists(), (
+        "Удалённое место не должно выводиться в карточках."
+    )
+    assert not TimelineEntry.objects.exclude(location_label="").exists()
+
+
+def test_category_delete_cascade_reported(
+    admin_client, admin_data, published_category
+):
+    from blog.models import Post
+
+    url = reverse("admin:blog_category_delete", args=(published_category.pk,))
+    response = admin_client.post(url, {"post": "yes"}, follow=True)
+    assert any(
+        f"обновлено постов — {N_ROWS}" in str(message)
+        for message in response.context["messages"]
+    ), "Админка должна сообщать о каскаде при удалении категории."
+    assert not Post.objects.filter(is_visible=True).exists()
+
+
+def test_post_list_editable_saves(
+    admin_client, admin_data, published_category
+):
+    url = reverse("admin:blog_post_changelist")
+    response = admin_client.get(url)
+    formset = response.context["cl"].formset
+    data = {
+        f"{formset.prefix}-{key}": value
+        for key, value in formset.management_form.initial.items()
+    }
+    for index, form in enumerate(formset.forms):
+        data[f"{formset.prefix}-{index}-id"] = form.instance.pk
+        data[f"{formset.prefix}-{index}-category"] = published_category.pk
+    data["_save"] = "Сохранить"
+    # Сохранение каждой строки читает прежние категорию и автора поста
+    # для сброса кеша лент (pre_save): это запись, а не вывод списка.
+    with override_settings(BLOG_NPLUSONE={"THRESHOLD": N_ROWS, "RAISE": True}):
+        response = admin_client.post(url, data)
+    assert response.status_code == 302
+    from blog.models import Post
+
+    assert not Post.objects.filter(is_published=True).exists()
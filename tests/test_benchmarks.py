@@ -0,0 +1,130 @@
+"""Бенчмарки горячих страниц блога.
+
+Запуск: `BLOG_BENCHMARK=1 pytest tests/test_benchmarks.py`.
+Медианы сравниваются с `tests/benchmark_baselines.json`; тест падает,
+если страница стала медленнее на `BLOG_BENCHMARK_THRESHOLD` процентов
+(по умолчанию 25) или выполняет больше SQL-запросов.
+`BLOG_BENCHMARK_UPDATE=1` перезаписывает базовые значения.
+"""
+import json
+import os
+import statistics
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test.client import Client
+from django.urls import reverse
+
+from blog.instrumentation import measure
+
+pytestmark = [
+    pytest.mark.skipif(
+        not os.environ.get("BLOG_BENCHMARK"),
+        reason="Бенчмарки включаются переменной BLOG_BENCHMARK=1.",
+    ),
+    pytest.mark.django_db,
+]
+
+BASELINES = Path(__file__).parent / "benchmark_baselines.json"
+ROUNDS = int(os.environ.get("BLOG_BENCHMARK_ROUNDS", 15))
+THRESHOLD = float(os.environ.get("BLOG_BENCHMARK_THRESHOLD", 25))
+DATASET = {
+    "users": 50, "categories": 10, "locations": 10,
+    "posts": 3000, "comments": 15000, "images": 0, "seed": 1,
+}
+
+
+@pytest.fixture(scope="module")
+def dataset(django_db_setup, django_db_blocker):
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from blog.models import Category, Post
+
+    with django_db_blocker.unblock():
+        call_command("generate_data", **DATASET, stdout=StringIO())
+        post = Post.objects.published().order_by("-comment_count").first()
+        author = get_user_model().objects.annotate(
+            post_total=Count("posts")
+        ).order_by("-post_total").first()
+        category = Category.objects.filter(is_published=True).annotate(
+            post_total=Count("posts")
+        ).order_by("-post_total").first()
+        yield {
+            "index": ("get", reverse("blog:index")),
+            "category_posts": ("get", reverse(
+                "blog:category_posts", args=(category.slug,)
+            )),
+            "profile": ("get", reverse(
+                "blog:profile", args=(author.username,)
+            )),
+            "post_detail": ("get", reverse(
+                "blog:post_detail", args=(post.pk,)
+            )),
+            "add_comment": ("post", reverse(
+                "blog:add_comment", args=(post.pk,)
+            )),
+            "author": author,
+        }
+        call_command("flush", interactive=False)
+
+
+def _run(client, method, url):
+    """Медианы по всем частям запроса при холодном кеше, в мс."""
+    rounds = []
+    for _ in range(ROUNDS):
+        for cache in caches.all():
+            cache.clear()
+        data = {"text": "Комментарий бенчмарка"} if method == "post" else None
+        with measure() as measurement:
+            response = getattr(client, method)(url, data)
+        assert response.status_code in (200, 302)
+        rounds.append(measurement.as_dict())
+    return {
+        key: statistics.median(sample[key] for sample in rounds)
+        * (1 if key == "queries" else 1000)
+        for key in rounds[0]
+    }
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["index", "category_posts", "profile", "post_detail", "add_comment"],
+)
+def test_benchmark(name, dataset):
+    client = Client()
+    client.force_login(dataset["author"])
+    method, url = dataset[name]
+    _run(client, method, url)
+    result = _run(client, method, url)
+    print(
+        f"\n{name}: {result['total']:.1f} мс (SQL {result['query_time']:.1f}"
+        f" мс / {result['queries']:.0f} запросов, шаблоны"
+        f" {result['template_time']:.1f} мс, Python"
+        f" {result['python_time']:.1f} мс)"
+    )
+    baselines = (
+        json.loads(BASELINES.read_text(encoding="utf-8"))
+        if BASELINES.exists() else {}
+    )
+    if os.environ.get("BLOG_BENCHMARK_UPDATE") or name not in baselines:
+        baselines[name] = {key: round(value, 3)
+                           for key, value in result.items()}
+        BASELINES.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+        return
+    baseline = baselines[name]
+    limit = baseline["total"] * (1 + THRESHOLD / 100)
+    assert result["total"] <= limit, (
+        f"Страница `{name}` замедлилась: {result['total']:.1f} мс при"
+        f" базовых {baseline['total']:.1f} мс (допуск {THRESHOLD:.0f}%)."
+    )
+    assert result["queries"] <= baseline["queries"], (
+        f"Страница `{name}` выполняет {result['queries']:.0f} SQL-запросов"
+        f" вместо {baseline['queries']:.0f}."
+    )
@@ -0,0 +1,111 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+CREATED_AT = "2022-12-18T23:03:52.159Z"
+
+
+def _records(posts=3):
+    # Порядок записей нарочно обратный зависимостям.
+    records = [
+        {
+            "model": "blog.comment",
+            "pk": pk,
+            "fields": {
+                "created_at": CREATED_AT,
+                "text": f"Комментарий про котов {pk}",
+                "post": pk,
+                "author": 50,
+            },
+        }
+        for pk in range(1, posts + 1)
+    ]
+    records += [
+        {
+            "model": "blog.post",
+            "pk": pk,
+            "fields": {
+                "created_at": CREATED_AT,
+                "is_published": True,
+                "title": f"Пост {pk}",
+                "text": "Текст",
+                "pub_date": "2022-12-18T00:00:00Z",
+                "author": 50,
+                "category": 50,
+                "location": None,
+            },
+        }
+        for pk in range(1, posts + 1)
+    ]
+    records += [
+        {
+            "model": "blog.category",
+            "pk": 50,
+            "fields": {
+                "created_at": CREATED_AT,
+                "is_published": True,
+                "title": "Категория",
+                "slug": "bulk",
+                "description": "Описание",
+            },
+        },
+        {
+            "model": "auth.user",
+            "pk": 50,
+            "fields": {
+                "password": "!",
+                "username": "bulk",
+                "date_joined": CREATED_AT,
+                "groups": [],
+                "user_permissions": [],
+            },
+        },
+    ]
+    return records
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_bulk_loaddata(tmp_path, compressed):
+    from blog.models import Comment, Post
+    from blog.search import search_page
+
+    path = tmp_path / ("fixture.json.gz" if compressed else "fixture.json")
+    opener = gzip.open if compressed else open
+    with opener(path, "wt", encoding="utf-8") as fixture:
+        json.dump(_records(), fixture, ensure_ascii=False)
+
+    call_command("bulk_loaddata", str(path), batch_size=2)
+
+    assert Post.objects.count() == 3
+    comment = Comment.objects.get(pk=1)
+    assert comment.created_at.isoformat().startswith("2022-12-18T23:03:52"), (
+        "Убедитесь, что загрузчик сохраняет даты из фикстуры, как loaddata."
+    )
+    assert Post.objects.get(pk=1).updated_at is not None
+    assert set(Post.objects.values_list("comment_count", flat=True)) == {1}
+    assert len(search_page("коты")) == 3
+
+
+def test_bulk_loaddata_overwrites_existing(tmp_path):
+    from blog.models import Post
+
+    path = tmp_path / "fixture.json"
+    path.write_text(json.dumps(_records(posts=1)), encoding="utf-8")
+    call_command("bulk_loaddata", str(path))
+    Post.objects.filter(pk=1).update(title="Изменён")
+    call_command("bulk_loaddata", str(path))
+    assert Post.objects.get(pk=1).title == "Пост 1"
+    assert Post.objects.count() == 1
+
+
+def test_loaddata_old_fixture(tmp_path):
+    from blog.models import Post
+
+    path = tmp_path / "fixture.json"
+    path.write_text(json.dumps(_records(posts=1)), encoding="utf-8")
+    call_command("loaddata", str(path), verbosity=0)
+    assert Post.objects.get(pk=1).updated_at is not None
@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comment_views(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Первый"})
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Второй"})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при добавлении комментария увеличивается"
+        " счётчик `comment_count` у поста."
+    )
+
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении комментария уменьшается"
+        " счётчик `comment_count` у поста."
+    )
+
+
+def test_comment_count_on_queryset_delete(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    post.comments.all().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0
+
+
+def test_comment_counts_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+
+    with pytest.raises(CommandError):
+        call_command("comment_counts", "--check")
+    call_command("comment_counts")
+    call_command("comment_counts", "--check")
+    post.refresh_from_db()
+    assert post.comment_count == 2
@@ -0,0 +1,53 @@
+import pytest
+from bs4 import BeautifulSoup
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _comment_anchors(html):
+    soup = BeautifulSoup(html, features="html.parser")
+    return [
+        a["name"] for a in soup.find_all("a")
+        if a.get("name", "").startswith("comment_")
+    ]
+
+
+def test_detail_shows_first_comments_and_loads_rest(
+    client, mixer, post_with_published_location
+):
+    from blog.constants import COMMENTS_PER_PAGE
+
+    post = post_with_published_location
+    total = COMMENTS_PER_PAGE + 5
+    comments = mixer.cycle(total).blend(
+        "blog.Comment", post=post, author=post.author
+    )
+    expected = [f"comment_{c.id}" for c in comments]
+
+    response = client.get(f"/posts/{post.id}/")
+    inline = _comment_anchors(response.content.decode())
+    assert inline == expected[:COMMENTS_PER_PAGE], (
+        "Убедитесь, что на странице поста сразу выводятся только первые"
+        f" {COMMENTS_PER_PAGE} комментариев."
+    )
+
+    page = response.context["comments"]
+    assert page.has_next()
+    fragment = client.get(
+        f"/posts/{post.id}/comments/?cursor={page.next_cursor}"
+    )
+    assert fragment.status_code == 200
+    html = fragment.content.decode()
+    assert _comment_anchors(html) == expected[COMMENTS_PER_PAGE:]
+    assert "<html" not in html
+    assert "js-more-comments" not in html
+
+
+def test_comment_fragment_hides_unpublished_post(
+    client, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", is_published=False, category=published_category,
+        author=user,
+    )
+    assert client.get(f"/posts/{post.id}/comments/").status_code == 404
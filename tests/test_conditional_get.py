@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_not_modified(
+    client, mixer, post_with_published_location, django_assert_max_num_queries
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    response = client.get(url)
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), "Убедитесь, что страница поста отдаёт заголовки ETag и Last-Modified."
+
+    etag = response["ETag"]
+    with django_assert_max_num_queries(1):
+        cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    fresh = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert fresh.status_code == HTTPStatus.OK
+    assert fresh["ETag"] != etag
+
+
+def test_post_detail_etag_depends_on_user(
+    client, user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = client.get(url)["ETag"]
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_hidden_post_has_no_validators(client, mixer, user):
+    post = mixer.blend("blog.Post", is_published=False, author=user)
+    response = client.get(f"/posts/{post.id}/", HTTP_IF_NONE_MATCH="*")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.fixture
+def feed_urls(published_category, user):
+    return (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+
+
+def test_feeds_not_modified(
+    client, mixer, user, published_category, post_with_published_location,
+    feed_urls, django_assert_num_queries
+):
+    etags = {}
+    for url in feed_urls:
+        etags[url] = client.get(url)["ETag"]
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что страница `{url}` отвечает 304 Not Modified"
+            " на запрос с актуальным ETag."
+        )
+    mixer.blend("blog.Post", author=user, category=published_category)
+    for url in feed_urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK
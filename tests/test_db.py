@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.db import PrimaryReplicaRouter, configure_sqlite, replica_reads
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def router():
+    with override_settings(BLOG_DB_REPLICAS=["replica"]):
+        yield PrimaryReplicaRouter()
+
+
+def test_reads_outside_request_go_to_primary(router):
+    assert router.db_for_read(Post) == "default", (
+        "Вне replica_reads чтение должно идти в основную базу."
+    )
+
+
+def test_reads_go_to_replica_until_write(router):
+    with replica_reads():
+        # Тест идёт внутри транзакции: имитируем запрос вне её.
+        connection.in_atomic_block, atomic = False, connection.in_atomic_block
+        try:
+            assert router.db_for_read(Post) == "replica", (
+                "GET-запрос должен читать с реплики."
+            )
+            assert router.db_for_write(Post) == "default"
+            assert router.db_for_read(Post) == "default", (
+                "После записи запрос должен читать из основной базы,"
+                " чтобы видеть свои изменения."
+            )
+        finally:
+            connection.in_atomic_block = atomic
+
+
+def test_reads_in_transaction_go_to_primary(router):
+    with replica_reads():
+        assert router.db_for_read(Post) == "default"
+
+
+def test_no_migrations_on_replica(router):
+    assert router.allow_migrate("default", "blog")
+    assert not router.allow_migrate("replica", "blog")
+
+
+@override_settings(
+    BLOG_SQLITE_PRAGMAS={"cache_size": -4000, "busy_timeout": 1234}
+)
+def test_sqlite_pragmas_applied():
+    configure_sqlite(None, connection)
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone()[0] == 1234
+        cursor.execute("PRAGMA cache_size")
+        assert cursor.fetchone()[0] == -4000
+
+
+def test_health(client):
+    response = client.get(reverse("blog:health"))
+    assert response.status_code == 200
+    assert response.json()["ok"] is True
+    assert response.json()["databases"]["default"] == "ok"
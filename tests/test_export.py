@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def exported(post_with_published_location, mixer, user):
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    return post_with_published_location
+
+
+def test_export_jsonl(tmp_path, exported):
+    path = tmp_path / "blog.jsonl.gz"
+    call_command("export_blog", output=str(path))
+    with gzip.open(path, "rt", encoding="utf-8") as stream:
+        rows = [json.loads(line) for line in stream]
+    assert [row["model"] for row in rows] == ["blog.post"] + [
+        "blog.comment"
+    ] * 3
+    assert rows[0]["id"] == exported.id
+    assert rows[0]["title"] == exported.title
+
+
+def test_export_fixture_loads_back(tmp_path, exported):
+    from blog.models import Comment, Post
+
+    path = tmp_path / "blog.json"
+    call_command("export_blog", format="json", output=str(path))
+    expected = list(Comment.objects.values_list("id", "text", "created_at"))
+    Post.objects.all().delete()
+    call_command("loaddata", str(path), verbosity=0)
+    assert Post.objects.get().title == exported.title
+    assert list(
+        Comment.objects.values_list("id", "text", "created_at")
+    ) == expected, "Выгрузка в JSON должна загружаться обратно loaddata."
+
+
+def test_export_csv_single_model(tmp_path, exported):
+    with pytest.raises(CommandError):
+        call_command("export_blog", format="csv", output=str(tmp_path / "x"))
+
+
+def test_export_view_streams(admin_client, exported):
+    response = admin_client.get("/export/comment/", {"format": "csv"})
+    assert response.streaming
+    rows = list(csv.reader(io.StringIO(
+        b"".join(response.streaming_content).decode()
+    )))
+    assert rows[0][:2] == ["id", "text"]
+    assert len(rows) == 4
+
+
+def test_export_view_gzip(admin_client, exported):
+    response = admin_client.get("/export/post/", {"gzip": "1"})
+    assert response["Content-Disposition"].endswith('post.jsonl.gz"')
+    content = gzip.decompress(b"".join(response.streaming_content))
+    assert json.loads(content)["id"] == exported.id
+
+
+def test_admin_export_action(admin_client, exported):
+    response = admin_client.post(
+        "/admin/blog/post/",
+        {"action": "export_jsonl", "_selected_action": [exported.id]},
+    )
+    assert response.streaming
+    rows = b"".join(response.streaming_content).decode().splitlines()
+    assert len(rows) == 1
@@ -0,0 +1,127 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_urls(published_category, user):
+    return (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+
+
+def test_anonymous_feed_served_from_cache(
+    client, django_assert_num_queries, many_posts_with_published_locations,
+    feed_urls
+):
+    from blog.cache import feed_cache_stats
+
+    for url in feed_urls:
+        first = client.get(url)
+        before = feed_cache_stats()
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content
+        assert feed_cache_stats()["hits"] == before["hits"] + 1
+
+
+def test_logged_in_feed_not_cached(
+    user_client, many_posts_with_published_locations
+):
+    from blog.cache import feed_cache_stats
+
+    user_client.get("/")
+    user_client.get("/")
+    assert feed_cache_stats() == {"hits": 0, "misses": 0}
+
+
+def test_new_post_invalidates_feeds(
+    client, mixer, user, published_category, published_location, feed_urls
+):
+    for url in feed_urls:
+        client.get(url)
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        title="Свежий пост для сброса кеша",
+    )
+    for url in feed_urls:
+        assert post.title in client.get(url).content.decode(), (
+            f"Убедитесь, что новый пост сбрасывает кеш страницы `{url}`."
+        )
+
+
+def test_comment_invalidates_only_related_feeds(
+    client, mixer, post_with_published_location, another_category
+):
+    other_url = f"/category/{another_category.slug}/"
+    post = post_with_published_location
+    client.get("/")
+    client.get(other_url)
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    assert "Комментарии (1)" in client.get("/").content.decode()
+
+    from blog.cache import feed_cache_stats
+
+    before = feed_cache_stats()
+    client.get(other_url)
+    assert feed_cache_stats()["hits"] == before["hits"] + 1
+
+
+def test_location_change_invalidates_feeds(
+    client, post_with_published_location
+):
+    location = post_with_published_location.location
+    client.get("/")
+    location.name = "Новое место"
+    location.save()
+    assert "Новое место" in client.get("/").content.decode()
+
+
+def test_noop_location_save_keeps_feeds(
+    client, post_with_published_location
+):
+    from blog.cache import feed_cache_stats
+
+    client.get("/")
+    post_with_published_location.location.save()
+    before = feed_cache_stats()
+    client.get("/")
+    assert feed_cache_stats()["hits"] == before["hits"] + 1, (
+        "Убедитесь, что сохранение локации без изменений "
+        "не сбрасывает кеш лент."
+    )
+
+
+def test_username_change_invalidates_feeds(
+    client, post_with_published_location
+):
+    author = post_with_published_location.author
+    client.get("/")
+    author.username = "renamed_author"
+    author.save()
+    assert "renamed_author" in client.get("/").content.decode(), (
+        "Убедитесь, что смена имени автора сбрасывает кеш лент "
+        "с его постами."
+    )
+
+
+def test_unrelated_user_save_keeps_feeds(
+    client, post_with_published_location, another_user
+):
+    from blog.cache import feed_cache_stats
+
+    client.get("/")
+    another_user.first_name = "Иван"
+    another_user.save()
+    post_with_published_location.author.save(update_fields=["last_login"])
+    before = feed_cache_stats()
+    client.get("/")
+    assert feed_cache_stats()["hits"] == before["hits"] + 1, (
+        "Убедитесь, что правка профиля без постов и вход пользователя "
+        "не сбрасывают кеш главной страницы."
+    )
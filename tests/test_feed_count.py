@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+N_POSTS = 25
+
+
+@pytest.fixture
+def feed(mixer, user, published_category):
+    return mixer.cycle(N_POSTS).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def _counts(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, sum("COUNT(" in q["sql"] for q in queries)
+
+
+def test_count_cached_until_feed_changes(
+    user_client, feed, mixer, user, published_category
+):
+    url = f"/category/{published_category.slug}/"
+    response, counted = _counts(user_client, url)
+    assert counted == 1
+    assert response.context["page_obj"].paginator.count == N_POSTS
+    response, counted = _counts(user_client, f"{url}?page=2")
+    assert counted == 0, "Число постов ленты должно браться из кеша."
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    response, counted = _counts(user_client, url)
+    assert counted == 1, "Новый пост должен сбрасывать закешированное число."
+    assert response.context["page_obj"].paginator.count == N_POSTS + 1
+
+
+def test_large_feed_uses_estimate(client, feed, published_category):
+    from blog.models import FeedCounter
+
+    call_command("feed_counters", stdout=StringIO())
+    FeedCounter.objects.filter(scope="index").update(posts=20000)
+    response, counted = _counts(client, "/")
+    assert counted == 0, "Для большой ленты COUNT выполняться не должен."
+    page = response.context["page_obj"]
+    assert page.paginator.approximate
+    assert page.paginator.num_pages == 2000
+    assert "из ~2000" in response.content.decode()
+    assert page.has_next()
+    last = client.get("/?page=3").context["page_obj"]
+    assert len(last) == N_POSTS - 20
+    assert not last.has_next(), (
+        "Последняя фактическая страница не должна ссылаться дальше."
+    )
+    assert client.get("/?page=50").status_code == 200
+
+
+def test_feed_counters_command_and_signals(
+    feed, mixer, user, published_category
+):
+    from blog.models import FeedCounter
+
+    call_command("feed_counters", stdout=StringIO())
+    counters = dict(FeedCounter.objects.values_list("scope", "posts"))
+    assert counters["index"] == N_POSTS
+    assert counters[f"category:{published_category.slug}"] == N_POSTS
+    assert counters[f"profile:{user.username}"] == N_POSTS
+    feed[0].delete()
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert FeedCounter.objects.get(scope="index").posts == N_POSTS - 1
+    call_command("feed_counters", stdout=StringIO())
+    assert FeedCounter.objects.get(scope="index").posts == N_POSTS - 1
+
+
+def test_counters_follow_visibility_changes(
+    feed, user, published_category
+):
+    from blog.models import FeedCounter, Post
+    from blog.scheduling import publish_due
+
+    call_command("feed_counters", stdout=StringIO())
+
+    def counters():
+        return dict(FeedCounter.objects.values_list("scope", "posts"))
+
+    scheduled = Post.objects.create(
+        title="Отложенный пост", text="Текст", author=user,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    assert counters()["index"] == N_POSTS
+    Post.objects.filter(pk=scheduled.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    assert publish_due() == 1
+    expected = {
+        "index": N_POSTS + 1,
+        f"category:{published_category.slug}": N_POSTS + 1,
+        f"profile:{user.username}": N_POSTS + 1,
+    }
+    assert counters() == expected, (
+        "Убедитесь, что публикация отложенного поста увеличивает"
+        " счётчики его лент."
+    )
+
+    post = feed[0]
+    post.is_published = False
+    post.save()
+    assert counters()["index"] == N_POSTS, (
+        "Снятие поста с публикации должно уменьшать счётчики лент."
+    )
+
+    published_category.is_published = False
+    published_category.save()
+    assert set(counters().values()) == {0}
+    published_category.is_published = True
+    published_category.save()
+    assert counters() == {scope: N_POSTS for scope in expected}
+    call_command("feed_counters", stdout=StringIO())
+    assert counters() == {scope: N_POSTS for scope in expected}
@@ -0,0 +1,106 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _photo(width=900, height=600):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG"
+    )
+    return SimpleUploadedFile(
+        "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+def test_upload_builds_derivatives(
+    user_client, published_category, published_location
+):
+    from blog.images import derivative_name, widths_for
+    from blog.models import Post
+
+    user_client.post(
+        "/posts/create/",
+        {
+            "title": "С фото",
+            "text": "Текст",
+            "pub_date": "2020-01-01T10:00",
+            "category": published_category.id,
+            "location": published_location.id,
+            "image": _photo(),
+        },
+    )
+    post = Post.objects.get(title="С фото")
+    assert post.image_width == 900
+    widths = widths_for(900)
+    assert widths, "Оригинал должен быть шире наименьшей производной."
+    for width in widths:
+        for extension in ("webp", "jpg"):
+            name = derivative_name(post.image.name, width, extension)
+            assert default_storage.exists(name)
+            with default_storage.open(name) as derivative:
+                assert Image.open(derivative).width == width
+
+    content = user_client.get("/").content.decode()
+    assert 'type="image/webp"' in content
+    assert derivative_name(post.image.name, widths[0], "jpg") in content
+
+
+def test_backfill_command(post_with_published_location):
+    from blog.images import derivative_name, widths_for
+
+    post = post_with_published_location
+    post.image.save("big.jpg", _photo(1000, 500))
+    assert post.image_width is None
+
+    call_command("build_image_derivatives", "--workers", "1")
+    post.refresh_from_db()
+    assert post.image_width == 1000
+    for width in widths_for(1000):
+        assert default_storage.exists(
+            derivative_name(post.image.name, width, "webp")
+        )
+
+
+def test_derivative_names_keep_extension():
+    from blog.images import derivative_name
+
+    assert derivative_name("posts_images/a.jpg", 480, "webp") != (
+        derivative_name("posts_images/a.png", 480, "webp")
+    ), "Производные изображений с разными расширениями не должны совпадать."
+
+
+def test_replaced_image_derivatives_deleted(
+    post_with_published_location, django_capture_on_commit_callbacks
+):
+    from blog.images import build_derivatives, derivative_name, widths_for
+
+    post = post_with_published_location
+    post.image.save("old.jpg", _photo(1000, 500))
+    old_name = post.image.name
+    build_derivatives(old_name)
+    old_files = [
+        derivative_name(old_name, width, "webp") for width in widths_for(1000)
+    ]
+    assert all(map(default_storage.exists, old_files))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image.save("new.jpg", _photo(1000, 500))
+    assert not any(map(default_storage.exists, old_files)), (
+        "Убедитесь, что при замене изображения старые производные удаляются."
+    )
+
+    new_name = post.image.name
+    build_derivatives(new_name)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.image = None
+        post.save()
+    assert not default_storage.exists(
+        derivative_name(new_name, widths_for(1000)[0], "webp")
+    ), "Убедитесь, что производные удаляются вместе с изображением поста."
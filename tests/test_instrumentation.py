@@ -0,0 +1,28 @@
+import pytest
+from django.urls import reverse
+
+from blog.instrumentation import measure
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_measure_splits_request_time(
+    client, many_posts_with_published_locations
+):
+    with measure() as measurement:
+        response = client.get(reverse("blog:index"))
+    assert response.status_code == 200
+    assert measurement.queries > 0
+    assert measurement.query_time > 0
+    assert measurement.template_time > 0
+    assert measurement.total >= (
+        measurement.query_time + measurement.template_time
+    ), "Время SQL и шаблонов не должно превышать общее время запроса."
+
+
+def test_measure_outside_block_does_not_count(client):
+    with measure() as measurement:
+        pass
+    client.get(reverse("blog:index"))
+    assert measurement.queries == 0
+    assert measurement.template_time == 0
@@ -0,0 +1,52 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.loadtest import LOAD_MIX, percentile
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def test_every_blog_url_in_load_mix():
+    from blog.urls import urlpatterns
+
+    missing = {p.name for p in urlpatterns} - set(LOAD_MIX)
+    assert not missing, (
+        "Добавьте в `LOAD_MIX` нагрузочного теста страницы:"
+        f" {', '.join(sorted(missing))}."
+    )
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.5) == 50
+    assert percentile(samples, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_generate_data_and_loadtest(tmp_path):
+    from blog.models import Comment, Post
+
+    call_command(
+        "generate_data", users=5, categories=2, locations=2, posts=40,
+        comments=100, images=0, seed=1, stdout=StringIO(),
+    )
+    assert Post.objects.count() == 40
+    assert Comment.objects.count() == 100
+    for post in Post.objects.all():
+        assert post.comment_count == post.comments.count(), (
+            "Генератор данных должен заполнять `comment_count` постов."
+        )
+    report_path = tmp_path / "report.json"
+    # Один поток: тестовая база SQLite в памяти блокирует таблицы целиком.
+    call_command(
+        "loadtest", requests=60, workers=1, warmup=0, seed=1,
+        json_path=str(report_path), stdout=StringIO(),
+    )
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["requests"] == 60
+    for name, row in report["urls"].items():
+        assert row["errors"] == 0, f"Страница `{name}` вернула ошибку."
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
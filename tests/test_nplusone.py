@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.nplusone import NPlusOneError, normalize
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_normalize_ignores_literals():
+    assert normalize(
+        "SELECT * FROM t WHERE id = 5 AND name = 'x'"
+    ) == normalize("SELECT * FROM t WHERE id = 12 AND name = 'y''z'")
+    assert normalize(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s)"
+    ) == normalize("SELECT * FROM t WHERE id IN (%s)")
+
+
+def test_loop_over_relation_detected(
+    assert_no_nplusone, many_posts_with_published_locations
+):
+    from blog.models import Post
+
+    with pytest.raises(NPlusOneError):
+        with assert_no_nplusone():
+            for post in Post.objects.all():
+                post.author.username
+    with assert_no_nplusone():
+        for post in Post.objects.select_related("author"):
+            post.author.username
+
+
+def test_middleware_logs_without_raise(client, caplog):
+    with override_settings(BLOG_NPLUSONE={"THRESHOLD": 0, "RAISE": False}):
+        with caplog.at_level(logging.WARNING, logger="blog.nplusone"):
+            response = client.get(reverse("blog:search"), {"q": "пост"})
+    assert response.status_code == 200
+    records = [r for r in caplog.records if hasattr(r, "nplusone")]
+    assert records, "Повторяющиеся запросы должны попадать в журнал."
+    assert records[0].nplusone["where"] == "blog:search"
+    assert records[0].nplusone["count"] >= 1
+
+
+def test_disabled_in_production():
+    from blogicum import settings_production
+
+    assert not settings_production.BLOG_NPLUSONE["ENABLED"], (
+        "Поиск N+1 не должен работать в продакшене."
+    )
+    assert "blog.nplusone.NPlusOneMiddleware" not in (
+        settings_production.MIDDLEWARE
+    )
@@ -0,0 +1,61 @@
+import pytest
+from django.test import override_settings
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.mark.parametrize(
+    "url_fmt", ["/?cursor={}", "/category/{slug}/?cursor={}"]
+)
+def test_cursor_pagination_walks_feed(
+    client, many_posts_with_published_locations, published_category, url_fmt
+):
+    url_fmt = url_fmt.replace("{slug}", published_category.slug)
+    expected = [post.id for post in client.get("/").context["page_obj"]]
+    expected += [
+        post.id for post in client.get("/?page=2").context["page_obj"]
+    ]
+
+    first = client.get(url_fmt.format(""))
+    page_obj = first.context["page_obj"]
+    assert getattr(page_obj, "is_cursor", False), (
+        "Убедитесь, что параметр `cursor` включает курсорную пагинацию."
+    )
+    assert len(page_obj) == N_PER_PAGE
+    assert page_obj.has_next() and not page_obj.has_previous()
+
+    second = client.get(url_fmt.format(page_obj.next_cursor))
+    assert _page_ids(first) + _page_ids(second) == expected, (
+        "Убедитесь, что курсорная пагинация выдаёт посты в том же порядке,"
+        " что и постраничная."
+    )
+    assert not second.context["page_obj"].has_next()
+
+    back = client.get(
+        url_fmt.format(second.context["page_obj"].previous_cursor)
+    )
+    assert _page_ids(back) == _page_ids(first)
+
+
+def test_cursor_pagination_mode_setting(
+    client, many_posts_with_published_locations
+):
+    with override_settings(BLOG_PAGINATION_MODE="cursor"):
+        response = client.get("/")
+    page_obj = response.context["page_obj"]
+    assert getattr(page_obj, "is_cursor", False)
+    assert f"?cursor={page_obj.next_cursor}" in response.content.decode()
+
+
+def test_invalid_cursor_returns_first_page(
+    client, many_posts_with_published_locations
+):
+    response = client.get("/?cursor=not-a-cursor")
+    assert response.status_code == 200
+    assert _page_ids(response) == _page_ids(client.get("/?cursor="))
@@ -0,0 +1,66 @@
+import pytest
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _card_key(post):
+    post.refresh_from_db()
+    return make_template_fragment_key("post_card", [post.id, post.card_version])
+
+
+def test_post_card_cached_across_feeds(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    assert cache.get(_card_key(post)) is not None, (
+        "Убедитесь, что карточка поста кешируется как фрагмент шаблона."
+    )
+    cached = cache.get(_card_key(post))
+    profile = user_client.get(f"/profile/{post.author.username}/")
+    assert cached in profile.content.decode()
+
+
+@pytest.mark.parametrize("change", ["comment", "category", "location"])
+def test_post_card_version_changes(
+    user_client, mixer, post_with_published_location, change
+):
+    post = post_with_published_location
+    user_client.get("/")
+    old_key = _card_key(post)
+    if change == "comment":
+        mixer.blend("blog.Comment", post=post, author=post.author)
+        expected = "Комментарии (1)"
+    elif change == "category":
+        type(post.category).objects.filter(pk=post.category_id).update(
+            title="Переименованная категория"
+        )
+        expected = "Переименованная категория"
+    else:
+        # Название места в карточке денормализовано в пост: его
+        # обновляет каскад при сохранении местоположения.
+        location = type(post.location).objects.get(pk=post.location_id)
+        location.name = "Переименованное место"
+        location.save()
+        expected = "Переименованное место"
+    assert _card_key(post) != old_key
+    assert expected in user_client.get("/").content.decode()
+
+
+def test_category_page_reuses_card_cached_on_index(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = " ".join(f"слово{number}" for number in range(40))
+    post.save()
+    user_client.get("/")
+    key = _card_key(post)
+    assert cache.get(key) is not None
+    cache.set(key, "<p>карточка из кеша</p>")
+    category = user_client.get(f"/category/{post.category.slug}/")
+    assert "<p>карточка из кеша</p>" in category.content.decode(), (
+        "Убедитесь, что лента категории из материализованной ленты "
+        "использует ту же закешированную карточку, что и главная."
+    )
@@ -0,0 +1,70 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.profiling import get_buffer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def profile_all():
+    with override_settings(BLOG_PROFILING={
+        "SAMPLE_RATE": 1, "BUFFER_SIZE": 3, "METRICS_TOKEN": "secret",
+    }):
+        get_buffer().clear()
+        yield get_buffer()
+
+
+def test_sampled_request_recorded(
+    profile_all, client, many_posts_with_published_locations
+):
+    client.get(reverse("blog:index"))
+    record = profile_all.records()[0]
+    assert record["view"] == "blog:index"
+    assert record["status"] == 200
+    assert record["queries"] > 0
+    assert record["template_time"] > 0
+    assert record["total"] >= record["query_time"] + record["template_time"]
+
+
+def test_buffer_keeps_last_records(profile_all, client):
+    for _ in range(5):
+        client.get(reverse("blog:search"))
+    assert len(profile_all.records()) == 3, (
+        "Кольцевой буфер должен хранить не больше BUFFER_SIZE записей."
+    )
+    assert profile_all.totals()["blog:search"]["count"] == 5
+
+
+def test_no_sampling(client):
+    with override_settings(BLOG_PROFILING={"SAMPLE_RATE": 0}):
+        get_buffer().clear()
+        client.get(reverse("blog:index"))
+        assert not get_buffer().records()
+
+
+def test_profiling_page_for_staff_only(profile_all, client, admin_client):
+    client.get(reverse("blog:index"))
+    response = admin_client.get(reverse("blog:profiling"))
+    assert response.status_code == 200
+    assert "blog:index" in response.content.decode()
+    assert client.get(reverse("blog:profiling")).status_code == 302
+
+
+def test_metrics_by_token(profile_all, client):
+    client.get(reverse("blog:index"))
+    response = client.get(
+        reverse("blog:metrics"), HTTP_AUTHORIZATION="Bearer secret"
+    )
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'blog_profiled_requests_total{view="blog:index"} 1' in body
+    assert "blog_feed_cache_misses_total" in body
+    assert "blog_tasks_depth" in body
+    response = client.get(
+        reverse("blog:metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+    )
+    assert response.status_code == 302, (
+        "Без верного токена метрики доступны только сотрудникам."
+    )
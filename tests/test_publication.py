@@ -0,0 +1,175 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(user, published_category):
+    from blog.models import Post
+
+    return Post.objects.create(
+        title="Отложенный пост",
+        text="Текст",
+        pub_date=timezone.now() + timedelta(hours=1),
+        author=user,
+        category=published_category,
+    )
+
+
+def test_feeds_filter_on_flag():
+    from blog.models import Post
+
+    sql = str(Post.objects.published().query)
+    where = sql.split("WHERE")[1].split("ORDER BY")[0]
+    assert "JOIN" not in sql and "pub_date" not in where, (
+        "Лента должна отбирать посты по флагу is_visible, без сравнения"
+        " дат и соединения с категориями."
+    )
+
+
+def test_publish_scheduled_command(scheduled_post):
+    from blog.models import Post
+
+    assert not scheduled_post.is_visible
+    call_command("publish_scheduled", stdout=StringIO())
+    scheduled_post.refresh_from_db()
+    assert not scheduled_post.is_visible, "Пост опубликован раньше срока."
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    out = StringIO()
+    call_command("publish_scheduled", stdout=out)
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible
+    assert "Опубликовано постов: 1" in out.getvalue()
+    assert set(scheduled_post.timeline_entries.values_list(
+        "is_visible", flat=True
+    )) == {True}
+
+
+def test_category_flip_changes_visibility(client, scheduled_post):
+    from blog.models import Post
+
+    post = Post.objects.create(
+        title="Пост", text="Текст", pub_date=timezone.now(),
+        author=scheduled_post.author, category=scheduled_post.category,
+    )
+    assert post.is_visible
+    category = post.category
+    category.is_published = False
+    category.save()
+    post.refresh_from_db()
+    assert not post.is_visible
+    category.is_published = True
+    category.save()
+    post.refresh_from_db()
+    scheduled_post.refresh_from_db()
+    assert post.is_visible and not scheduled_post.is_visible, (
+        "После публикации категории открываться должны только посты"
+        " с наступившей датой."
+    )
+
+
+def test_due_check_is_cached(client, scheduled_post):
+    client.get("/")
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/?page=1")
+    assert not any(
+        'ORDER BY "blog_post"."pub_date" ASC' in query["sql"]
+        for query in queries
+    ), (
+        "Дата ближайшей публикации должна браться из кеша."
+    )
+
+
+def test_scheduled_post_appears_without_restart(
+    client, monkeypatch, user, published_category
+):
+    from blog.models import Post
+
+    real_now = timezone.now()
+    post = Post.objects.create(
+        title="Отложенный пост",
+        text="Текст",
+        pub_date=real_now + timedelta(hours=1),
+        author=user,
+        category=published_category,
+    )
+    assert post not in client.get("/").context["page_obj"]
+
+    monkeypatch.setattr(
+        timezone, "now", lambda: real_now + timedelta(hours=2)
+    )
+    assert post in client.get("/").context["page_obj"], (
+        "Убедитесь, что отложенный пост появляется в ленте, когда наступает"
+        " дата публикации, без перезапуска сервера."
+    )
+    assert client.get(f"/posts/{post.id}/").status_code == 200
+
+
+def test_feed_request_only_enqueues_publication(client, scheduled_post):
+    from django.test import override_settings
+
+    from blog.models import Post, Task
+
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    with override_settings(BLOG_TASKS={"BACKEND": "database"}):
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/")
+        client.get(f"/category/{scheduled_post.category.slug}/")
+        assert not any(
+            query["sql"].startswith('UPDATE "blog_post"')
+            for query in queries
+        ), "Страница не должна сама публиковать отложенные посты."
+        assert Task.objects.count() == 1, (
+            "Одновременные запросы должны ставить одну задачу публикации."
+        )
+        scheduled_post.refresh_from_db()
+        assert not scheduled_post.is_visible
+        call_command("run_tasks", once=True, stdout=StringIO())
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible
+
+
+def test_recompute_after_bulk_changes(post_with_published_location):
+    from blog.models import Post
+
+    post = post_with_published_location
+    Post.objects.update(is_visible=False, location_label="")
+    call_command("publish_scheduled", "--all", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.is_visible
+    assert post.location_label == post.location.name
+    assert set(post.timeline_entries.values_list(
+        "is_visible", "location_label"
+    )) == {(True, post.location.name)}
+
+
+def test_deleted_category_hides_posts(client, post_with_published_location):
+    from blog.models import Post, TimelineEntry
+
+    post = post_with_published_location
+    post.category.delete()
+    post.refresh_from_db()
+    assert post.category is None
+    assert not post.is_visible, (
+        "Убедитесь, что посты удалённой категории скрываются."
+    )
+    assert not TimelineEntry.objects.filter(
+        post=post, is_visible=True
+    ).exists()
+    assert post not in Post.objects.published()
+    assert client.get("/").status_code == 200
+    assert client.get(
+        f"/profile/{post.author.username}/"
+    ).status_code == 200
+    assert client.get(f"/posts/{post.id}/").status_code == 404
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+pytestmark = [pytest.mark.django_db]
+
+# Число SQL-запросов на страницу для автора поста. Два из них —
+# сессия и пользователь, их выполняет AuthenticationMiddleware.
+# Страница поста дополнительно читает отметку изменения для ETag,
+# а новый комментарий попадает в поисковый индекс поста и в счётчик
+# материализованных лент. Ленты на холодном кеше читают оценку числа
+# постов из FeedCounter, а страницы с постами — дату ближайшей
+# отложенной публикации.
+QUERY_BUDGETS = {
+    "index": ("get", 6),
+    "post_detail": ("get", 6),
+    "post_comments": ("get", 5),
+    "create_post": ("get", 4),
+    "edit_post": ("get", 5),
+    "delete_post": ("get", 5),
+    "category_posts": ("get", 7),
+    "profile": ("get", 6),
+    "edit_profile": ("get", 3),
+    "add_comment": ("post", 11),
+    "edit_comment": ("get", 5),
+    "delete_comment": ("get", 5),
+    "feed_cache_stats": ("get", 2),
+    "task_stats": ("get", 2),
+    "search": ("get", 7),
+    "export": ("get", 2),
+    "profiling": ("get", 2),
+    "metrics": ("get", 2),
+    "health": ("get", 1),
+}
+
+
+@pytest.fixture
+def url_kwargs(
+    user, published_category, post_with_published_location, mixer
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    mixer.cycle(5).blend("blog.Comment", post=post, author=user)
+    return {
+        "pk": post.id,
+        "post_id": post.id,
+        "comment_id": comment.id,
+        "category_slug": published_category.slug,
+        "username": user.username,
+        "query": post.title,
+        "model_name": "post",
+    }
+
+
+def _reverse(name, url_kwargs):
+    from blog.urls import urlpatterns
+
+    pattern = next(p for p in urlpatterns if p.name == name)
+    kwargs = {
+        key: url_kwargs[key] for key in pattern.pattern.converters
+    }
+    return reverse(f"blog:{name}", kwargs=kwargs)
+
+
+def test_every_blog_url_has_budget():
+    from blog.urls import urlpatterns
+
+    missing = {p.name for p in urlpatterns} - set(QUERY_BUDGETS)
+    assert not missing, (
+        "Задайте бюджет SQL-запросов в `QUERY_BUDGETS` для страниц:"
+        f" {', '.join(sorted(missing))}."
+    )
+
+
+@pytest.mark.parametrize("name", sorted(QUERY_BUDGETS))
+def test_query_budget(
+    name, user_client, url_kwargs, many_posts_with_published_locations,
+    django_assert_max_num_queries
+):
+    method, budget = QUERY_BUDGETS[name]
+    url = _reverse(name, url_kwargs)
+    data = {"text": "Комментарий"} if method == "post" else None
+    if name == "search":
+        data = {"q": url_kwargs["query"]}
+    with django_assert_max_num_queries(budget):
+        response = getattr(user_client, method)(url, data)
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.FOUND)
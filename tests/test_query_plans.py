@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+BLOG_TABLES = ("blog_post", "blog_comment", "blog_timelineentry")
+
+
+def _main_queries(captured):
+    return [
+        query["sql"]
+        for query in captured.captured_queries
+        if query["sql"].startswith("SELECT")
+        and re.search(r'FROM "(%s)"' % "|".join(BLOG_TABLES), query["sql"])
+    ]
+
+
+def _explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def _assert_index_plan(client, url):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    assert response.status_code == 200
+    queries = _main_queries(captured)
+    assert queries, f"Страница `{url}` не выполнила запросов к постам."
+    for sql in queries:
+        plan = _explain(sql)
+        for step in plan:
+            assert "TEMP B-TREE" not in step, (
+                f"Запрос страницы `{url}` сортирует результат во временном"
+                f" B-дереве вместо индекса:\n{sql}\n{plan}"
+            )
+            if any(table in step for table in BLOG_TABLES):
+                assert "USING" in step, (
+                    f"Запрос страницы `{url}` выполняет полный просмотр"
+                    f" таблицы:\n{sql}\n{plan}"
+                )
+
+
+@pytest.fixture(autouse=True)
+def sqlite_only():
+    if connection.vendor != "sqlite":
+        pytest.skip("Планы запросов проверяются только на SQLite.")
+
+
+def test_index_uses_index(client, many_posts_with_published_locations):
+    _assert_index_plan(client, "/")
+    _assert_index_plan(client, "/?page=2")
+
+
+def test_category_uses_index(
+    client, many_posts_with_published_locations, published_category
+):
+    _assert_index_plan(client, f"/category/{published_category.slug}/")
+
+
+@pytest.mark.parametrize("as_author", [True, False])
+def test_profile_uses_index(
+    client, user_client, user, many_posts_with_published_locations, as_author
+):
+    _assert_index_plan(
+        user_client if as_author else client, f"/profile/{user.username}/"
+    )
+
+
+def test_post_detail_uses_index(
+    client, post_with_published_location, comment_to_a_post
+):
+    _assert_index_plan(client, f"/posts/{post_with_published_location.id}/")
@@ -0,0 +1,77 @@
+import pytest
+from django.db import OperationalError, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.db import LAST_WRITE_SESSION_KEY, copy_sqlite_replica
+from blog.models import Post
+from blogicum.settings_production import MIDDLEWARE as PRODUCTION_MIDDLEWARE
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """Реплика «replica» — копия тестовой базы в файле SQLite."""
+    connections.settings["replica"] = {
+        **connections.settings["default"],
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    settings.BLOG_DB_REPLICAS = ["replica"]
+    settings.DATABASE_ROUTERS = ["blog.db.PrimaryReplicaRouter"]
+    settings.MIDDLEWARE = PRODUCTION_MIDDLEWARE
+    yield "replica"
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+@pytest.fixture
+def synced_post(replica, post_with_published_location):
+    copy_sqlite_replica(replica)
+    return post_with_published_location
+
+
+def test_replica_is_copy_and_read_only(synced_post, replica):
+    assert Post.objects.using(replica).filter(pk=synced_post.pk).exists()
+    with pytest.raises(OperationalError):
+        Post.objects.using(replica).update(title="Запись в реплику")
+
+
+def test_anonymous_reads_from_replica(synced_post, replica, client):
+    with CaptureQueriesContext(connections[replica]) as queries:
+        client.get(reverse("blog:post_detail", args=(synced_post.pk,)))
+    assert queries, "Анонимный GET-запрос должен читать с реплики."
+
+
+def test_session_pinned_to_primary_after_write(
+    synced_post, replica, user_client, client
+):
+    url = reverse("blog:post_detail", args=(synced_post.pk,))
+    user_client.post(
+        reverse("blog:add_comment", args=(synced_post.pk,)),
+        {"text": "Свежий комментарий"},
+    )
+    assert LAST_WRITE_SESSION_KEY in user_client.session
+    with CaptureQueriesContext(connections[replica]) as queries:
+        response = user_client.get(url)
+    assert not queries, (
+        "После записи сессия должна читать основную базу."
+    )
+    assert "Свежий комментарий" in response.content.decode(), (
+        "Автор должен видеть свой комментарий сразу после отправки."
+    )
+    assert "Свежий комментарий" not in client.get(url).content.decode(), (
+        "Другие пользователи читают отстающую реплику."
+    )
+
+
+def test_pin_expires(synced_post, replica, user_client, settings):
+    settings.BLOG_REPLICA_PIN_SECONDS = 0
+    user_client.post(
+        reverse("blog:add_comment", args=(synced_post.pk,)),
+        {"text": "Комментарий"},
+    )
+    with CaptureQueriesContext(connections[replica]) as queries:
+        user_client.get(reverse("blog:index"))
+    assert queries, "По окончании окна сессия снова читает реплику."
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category, published_location):
+    def make(title="Заметка", text="Текст", **kwargs):
+        return mixer.blend(
+            "blog.Post",
+            title=title,
+            text=text,
+            **{
+                "author": user,
+                "category": published_category,
+                "location": published_location,
+                "is_published": True,
+                "pub_date": timezone.now() - timedelta(days=1),
+                **kwargs,
+            },
+        )
+    return make
+
+
+def _found(client, query, cursor=None):
+    params = {"q": query}
+    if cursor:
+        params["cursor"] = cursor
+    return client.get("/search/", params).context["page_obj"]
+
+
+def test_search_uses_russian_stemming(client, make_post):
+    post = make_post(text="Кошки гуляли по крышам")
+    make_post(text="Собака спит")
+    assert [found.id for found in _found(client, "кошка крыша")] == [
+        post.id
+    ], "Убедитесь, что поиск находит разные формы слов запроса."
+    assert not list(_found(client, "кошка собака"))
+
+
+def test_search_ranks_title_first(client, make_post):
+    in_text = make_post(text="Рецепт пирога")
+    in_title = make_post(title="Пироги", text="Просто текст")
+    assert [post.id for post in _found(client, "пирог")] == [
+        in_title.id, in_text.id
+    ], "Совпадение в заголовке должно быть выше совпадения в тексте."
+
+
+def test_search_respects_visibility(client, make_post):
+    make_post(text="Секретный черновик", is_published=False)
+    make_post(
+        text="Секретный анонс", pub_date=timezone.now() + timedelta(days=1)
+    )
+    assert not list(_found(client, "секретный"))
+
+
+def test_search_follows_edits_and_comments(client, user, make_post, mixer):
+    post = make_post(text="Первая версия")
+    post.text = "Вторая редакция"
+    post.save()
+    assert not list(_found(client, "первая"))
+    assert list(_found(client, "редакция"))
+
+    comment = mixer.blend(
+        "blog.Comment", post=post, author=user, text="Отличные фотографии"
+    )
+    assert [found.id for found in _found(client, "фотография")] == [post.id]
+    comment.text = "Хороший текст"
+    comment.save()
+    assert not list(_found(client, "фотография"))
+    comment.delete()
+    assert not list(_found(client, "хороший"))
+
+
+def test_search_cursor_pagination(client, make_post):
+    posts = [make_post(text="Общая тема") for _ in range(N_PER_PAGE + 2)]
+    first = _found(client, "тема")
+    assert len(first) == N_PER_PAGE and first.has_next()
+    second = _found(client, "тема", first.next_cursor)
+    found = [post.id for post in first] + [post.id for post in second]
+    assert sorted(found) == sorted(post.id for post in posts)
+    assert not second.has_next()
+
+
+def test_rebuild_search_index(client, make_post):
+    from blog.models import SearchEntry
+
+    post = make_post(text="Индексируемый текст")
+    SearchEntry.objects.all().delete()
+    call_command("rebuild_search_index", batch_size=1)
+    assert [found.id for found in _found(client, "индексируемый")] == [
+        post.id
+    ]
@@ -0,0 +1,173 @@
+from io import BytesIO
+
+import pytest
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+CALLS = []
+
+
+def flaky(fail_times):
+    CALLS.append(fail_times)
+    if len(CALLS) <= fail_times:
+        raise RuntimeError("Временная ошибка")
+
+
+def _photo_with_exif():
+    image = Image.new("RGB", (400, 300), color=(10, 20, 30))
+    exif = Image.Exif()
+    exif[0x0110] = "Камера"
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", exif=exif)
+    return SimpleUploadedFile(
+        "exif.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+def test_upload_strips_exif(
+    user_client, published_category, published_location
+):
+    from blog.models import Post
+
+    user_client.post(
+        "/posts/create/",
+        {
+            "title": "С EXIF",
+            "text": "Текст",
+            "pub_date": "2020-01-01T10:00",
+            "category": published_category.id,
+            "location": published_location.id,
+            "image": _photo_with_exif(),
+        },
+    )
+    post = Post.objects.get(title="С EXIF")
+    with default_storage.open(post.image.name) as stored:
+        assert not Image.open(stored).getexif(), (
+            "Убедитесь, что из загруженного изображения удаляются EXIF."
+        )
+    assert post.image_width == 400
+
+
+@override_settings(BLOG_TASKS={"BACKEND": "database", "RETRY_DELAY": 0})
+def test_database_backend_retries():
+    from blog.models import Task
+    from blog.tasks import get_backend, task
+
+    CALLS.clear()
+    task(max_retries=1)(flaky)
+    get_backend().enqueue(f"{__name__}.flaky", [1], {})
+    assert Task.objects.get().status == Task.Status.QUEUED
+
+    call_command("run_tasks", once=True)
+    queued = Task.objects.get()
+    assert queued.status == Task.Status.DONE, (
+        "Задача с ошибкой должна повторяться до `max_retries` раз."
+    )
+    assert queued.attempts == 2
+    assert "RuntimeError" in queued.last_error
+    assert get_backend().stats()["succeeded"] == 1
+
+
+@override_settings(BLOG_TASKS={"BACKEND": "database", "RETRY_DELAY": 0})
+def test_database_backend_gives_up():
+    from blog.models import Task
+    from blog.tasks import get_backend
+
+    CALLS.clear()
+    get_backend().enqueue(f"{__name__}.flaky", [10], {})
+    call_command("run_tasks", once=True)
+    failed = Task.objects.get()
+    assert failed.status == Task.Status.FAILED
+    assert get_backend().stats()["failed"] == 1
+
+
+@override_settings(
+    EMAIL_BACKEND="blog.mail.QueuedEmailBackend",
+    BLOG_EMAIL_DELIVERY_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+def test_queued_email_backend():
+    from blog.tasks import metrics
+
+    metrics.reset()
+    message = mail.EmailMultiAlternatives(
+        "Тема", "Текст", "from@example.com", ["to@example.com"]
+    )
+    message.attach_alternative("<p>Текст</p>", "text/html")
+    message.attach("a.bin", b"\x00data", "application/octet-stream")
+    assert message.send() == 1
+    assert len(mail.outbox) == 1
+    sent = mail.outbox[0]
+    assert sent.subject == "Тема"
+    assert sent.alternatives == [("<p>Текст</p>", "text/html")]
+    assert sent.attachments[0][1] == b"\x00data"
+    assert metrics.snapshot()["succeeded"] == 1
+
+
+@override_settings(BLOG_TASKS={"BACKEND": "database", "LEASE": 60})
+def test_database_backend_reclaims_stale_tasks():
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from blog.models import Task
+
+    CALLS.clear()
+    started = timezone.now() - timedelta(minutes=5)
+    stale = Task.objects.create(
+        name=f"{__name__}.flaky",
+        payload='{"args": [0], "kwargs": {}}',
+        status=Task.Status.RUNNING,
+        attempts=1,
+        started_at=started,
+    )
+    fresh = Task.objects.create(
+        name=f"{__name__}.flaky",
+        payload='{"args": [0], "kwargs": {}}',
+        status=Task.Status.RUNNING,
+        attempts=1,
+        started_at=timezone.now(),
+    )
+    call_command("run_tasks", once=True)
+    stale.refresh_from_db()
+    fresh.refresh_from_db()
+    assert stale.status == Task.Status.DONE, (
+        "Убедитесь, что задача, брошенная упавшим воркером, "
+        "возвращается в работу после истечения `LEASE`."
+    )
+    assert stale.attempts == 2
+    assert fresh.status == Task.Status.RUNNING
+
+
+def mark():
+    CALLS.append("mark")
+
+
+@override_settings(
+    BLOG_TASKS={"BACKEND": "thread", "WORKERS": 1, "RETRY_DELAY": 0.5}
+)
+def test_pool_retry_does_not_block_worker():
+    import time
+
+    from blog.tasks import get_backend, metrics, task
+
+    CALLS.clear()
+    metrics.reset()
+    task(max_retries=1)(flaky)
+    backend = get_backend()
+    backend._submit(f"{__name__}.flaky", [1], {})
+    backend._submit(f"{__name__}.mark", [], {})
+    deadline = time.time() + 5
+    while metrics.snapshot()["succeeded"] < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    backend.shutdown()
+    assert CALLS == [1, "mark", 1], (
+        "Убедитесь, что повтор задачи ждёт в таймере и не занимает "
+        "воркер пула."
+    )
+    assert metrics.snapshot()["retried"] == 1
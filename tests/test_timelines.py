@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post, TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+N_POSTS = 15
+
+
+@pytest.fixture
+def feed(mixer, user, published_category):
+    return mixer.cycle(N_POSTS).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def _entries():
+    return set(TimelineEntry.objects.values_list(
+        "feed", "post_id", "title", "comment_count", "category_is_published",
+        "author_username",
+    ))
+
+
+def test_category_page_reads_timeline_only(client, feed, published_category):
+    url = f"/category/{published_category.slug}/"
+    client.get(f"{url}?page=2")
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    sql = [query["sql"] for query in queries]
+    assert not any('FROM "blog_post"' in query for query in sql), (
+        "Лента категории должна читаться из материализованной ленты."
+    )
+    posts = list(response.context["page_obj"])
+    assert all(isinstance(post, Post) for post in posts)
+    expected = list(Post.objects.published().filter(
+        category=published_category
+    ).order_by("-pub_date", "title", "id").values_list("id", flat=True))
+    assert [post.id for post in posts] == expected[:len(posts)]
+
+
+def test_timelines_follow_changes(
+    client, feed, published_category, user, comment_to_a_post
+):
+    post = feed[0]
+    post.title = "Новый заголовок"
+    post.save()
+    assert TimelineEntry.objects.filter(
+        post=post, title="Новый заголовок"
+    ).count() == 2, "Пост должен обновляться в лентах автора и категории."
+    commented = comment_to_a_post.post
+    assert set(TimelineEntry.objects.filter(post=commented).values_list(
+        "comment_count", flat=True
+    )) == {1}
+    published_category.is_published = False
+    published_category.save()
+    response = client.get(f"/profile/{user.username}/")
+    assert post.id not in {p.id for p in response.context["page_obj"]}, (
+        "Посты снятой с публикации категории не должны попадать в ленты."
+    )
+    user.username = "renamed"
+    user.save()
+    assert set(TimelineEntry.objects.filter(author=user).values_list(
+        "author_username", flat=True
+    )) == {"renamed"}
+
+
+def test_rebuild_matches_incremental(feed, comment_to_a_post):
+    incremental = _entries()
+    call_command("rebuild_timelines", stdout=StringIO())
+    assert _entries() == incremental, (
+        "Ленты, поддерживаемые сигналами, должны совпадать с перестроенными."
+    )
+
+
+def test_cursor_pagination(client, settings, feed, published_category):
+    settings.BLOG_PAGINATION_MODE = "cursor"
+    url = f"/category/{published_category.slug}/"
+    first = client.get(url).context["page_obj"]
+    second = client.get(
+        url, {"cursor": first.next_cursor}
+    ).context["page_obj"]
+    ids = [post.id for post in [*first, *second]]
+    assert len(ids) == len(set(ids)) == N_POSTS